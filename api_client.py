@@ -0,0 +1,363 @@
+import json
+import queue
+import threading
+import time
+
+import numpy as np
+import requests
+import shapely
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_BASE_URL = "http://localhost:8000"
+
+# Timeout (connect, read) per endpoint, dalam detik
+DEFAULT_TIMEOUTS = {
+    "token": (3, 5),
+    "me": (3, 5),
+    "pusat": (3, 5),
+    "pusat_update": (3, 5),
+    "nearby_search": (3, 15),
+    "locations_sync": (3, 30),
+    "image": (3, 5),
+}
+
+# Jumlah baris per batch saat hasil pencarian di-stream ke peta
+STREAM_BATCH_SIZE = 200
+STREAM_FLUSH_INTERVAL = 0.2
+_END_OF_STREAM = object()
+
+CLIENT_ID = "janus-client"
+CLIENT_SECRET = "supersecret123"
+
+# Titik pusat dianggap segar selama CENTER_TTL detik; bila backend sedang tidak bisa dihubungi,
+# nilai lama masih dipakai sampai CENTER_STALE_TTL detik
+CENTER_TTL = 60
+CENTER_STALE_TTL = 600
+
+# Setelah koneksi ke backend gagal, request berikutnya langsung dianggap gagal selama sekian detik
+# (circuit breaker), supaya pencarian segera jatuh ke snapshot lokal tanpa menunggu connect lagi
+OFFLINE_RETRY_AFTER = 15
+
+POINT_TYPE_ID = 0   # shapely.get_type_id untuk POINT
+
+
+def wkb_to_latlon_arrays(values):
+    """
+    Decode banyak geometri POINT WKB (hex string atau bytes) sekaligus dengan fungsi array shapely.
+    Hasil (lats, lons, valid): array float64 dan mask bool; baris yang bukan POINT valid
+    (WKB rusak, None, tipe lain, POINT kosong) bernilai NaN dengan valid False.
+    """
+    raw = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        if isinstance(value, memoryview):   # bytea dari psycopg2
+            value = bytes(value)
+        raw[i] = value if isinstance(value, (str, bytes)) else None
+
+    geoms = shapely.from_wkb(raw, on_invalid="ignore")
+    valid = shapely.get_type_id(geoms) == POINT_TYPE_ID
+    valid[valid] = ~shapely.is_empty(geoms[valid])
+    geoms[~valid] = None
+    return shapely.get_y(geoms), shapely.get_x(geoms), valid
+
+
+def fill_latlon(locations, field: str = "coordinates"):
+    """
+    Lengkapi latitude/longitude lokasi yang hanya membawa geometri WKB hex (field "coordinates"),
+    di-decode sekaligus; lokasi dengan geometri tidak valid dibuang.
+    """
+    pending = [loc for loc in locations if loc.get("latitude") is None and field in loc]
+    if not pending:
+        return locations
+    lats, lons, valid = wkb_to_latlon_arrays([loc[field] for loc in pending])
+    invalid = set()
+    for loc, lat, lon, ok in zip(pending, lats, lons, valid):
+        if ok:
+            loc["latitude"] = float(lat)
+            loc["longitude"] = float(lon)
+        else:
+            invalid.add(id(loc))
+    if invalid:
+        print(f"Input Salah: {len(invalid)} lokasi dengan geometry tidak valid dilewati")
+        locations = [loc for loc in locations if id(loc) not in invalid]
+    return locations
+
+
+def wkbhex_to_latlon(wkb_hex: str):
+    """
+    Konversi WKB HEX POINT ke (latitude, longitude).
+    """
+    lats, lons, valid = wkb_to_latlon_arrays([wkb_hex])
+    if not valid[0]:
+        print("Input Salah: geometry bukan POINT yang valid")
+        return None
+    return float(lats[0]), float(lons[0])
+
+
+class ApiClient:
+    """
+    Client tunggal untuk backend API: satu Session dengan koneksi keep-alive yang dipakai ulang,
+    retry + backoff untuk error sementara (502/503/504, koneksi putus di tengah), timeout per endpoint,
+    dan catatan latency per endpoint. Gagal connect tidak di-retry: backend dianggap offline
+    selama OFFLINE_RETRY_AFTER detik dan request selama itu langsung raise ConnectionError.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, retries: int = 3, backoff: float = 0.3,
+                 pool_maxsize: int = 10, timeouts=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.metrics = {}
+        self._metrics_lock = threading.Lock()
+
+        self.center_ttl = CENTER_TTL
+        self.center_stale_ttl = CENTER_STALE_TTL
+        self._center = None     # (token, (lat, lon), waktu diambil)
+        self._center_lock = threading.Lock()
+        self.offline_retry_after = OFFLINE_RETRY_AFTER
+        self._offline_until = 0.0
+
+        retry = Retry(
+            total=retries,
+            connect=0,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            # POST /token tidak di-retry supaya login tidak terkirim dua kali
+            allowed_methods=frozenset({"GET", "PUT", "HEAD"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session = requests.Session()
+        self.session.headers["Accept"] = "application/json"
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, path: str) -> str:
+        if path.startswith(("http://", "https://")):
+            return path
+        return self.base_url + path
+
+    def request(self, endpoint: str, method: str, path: str, token: str = None, **kwargs):
+        """Kirim request ke backend, catat latency-nya, dan raise bila status bukan 2xx."""
+        if token:
+            kwargs["headers"] = dict(kwargs.get("headers") or {}, Authorization=token)
+        kwargs.setdefault("timeout", self.timeouts.get(endpoint, (3, 5)))
+
+        # login adalah aksi eksplisit pengguna, selalu dicoba ke backend
+        if endpoint != "token" and time.monotonic() < self._offline_until:
+            raise requests.exceptions.ConnectionError(f"Backend {self.base_url} sedang tidak bisa dihubungi")
+        # dengan stream=True request selesai begitu header diterima; body dicatat terpisah oleh pemanggil
+        if kwargs.get("stream"):
+            endpoint = f"{endpoint}_headers"
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = self.session.request(method, self.url(path), **kwargs)
+            self._offline_until = 0.0
+            response.raise_for_status()
+            ok = True
+            return response
+        except requests.exceptions.ConnectionError:
+            self._offline_until = time.monotonic() + self.offline_retry_after
+            raise
+        finally:
+            self.record(endpoint, time.perf_counter() - start, ok)
+
+    def record(self, endpoint: str, elapsed: float, ok: bool = True):
+        """Catat satu pengukuran latency (detik) untuk endpoint / tahap tertentu."""
+        with self._metrics_lock:
+            m = self.metrics.setdefault(endpoint, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+            m["count"] += 1
+            m["errors"] += 0 if ok else 1
+            m["total_ms"] += elapsed * 1000
+            m["max_ms"] = max(m["max_ms"], elapsed * 1000)
+
+    def metrics_summary(self) -> str:
+        with self._metrics_lock:
+            lines = [
+                f"{endpoint}: {m['count']}x, rata-rata {m['total_ms'] / m['count']:.0f} ms, "
+                f"maks {m['max_ms']:.0f} ms, gagal {m['errors']}"
+                for endpoint, m in sorted(self.metrics.items())
+            ]
+        return "\n".join(lines)
+
+    # --- endpoint backend ---
+
+    def login(self, username: str, password: str) -> dict:
+        payload = {
+            "grant_type": "password",
+            "username": username,
+            "password": password,
+            "scope": "",
+            "client_id": CLIENT_ID,
+            "client_secret": CLIENT_SECRET,
+        }
+        return self.request("token", "POST", "/token", data=payload).json()
+
+    def me(self, access_token: str) -> dict:
+        return self.request("me", "GET", "/me", token=f"Bearer {access_token}").json()
+
+    def pusat(self, token: str) -> dict:
+        return self.request("pusat", "GET", "/locations/pusat/", token=token).json()
+
+    def center(self, token: str):
+        """
+        (lat, lon) titik pusat dari /locations/pusat/, dicache selama center_ttl detik.
+        Lookup yang bersamaan dari beberapa worker hanya menghasilkan satu request.
+        """
+        with self._center_lock:
+            cached = self._center
+            age = time.monotonic() - cached[2] if cached and cached[0] == token else None
+            if age is not None and age < self.center_ttl:
+                return cached[1]
+            try:
+                center = wkbhex_to_latlon(self.pusat(token)['coordinates'])
+            except requests.exceptions.RequestException as e:
+                if age is not None and age < self.center_stale_ttl:
+                    print(f"Backend tidak bisa dihubungi, memakai titik pusat lama ({age:.0f} detik): {e}")
+                    return cached[1]
+                raise
+            self._center = (token, center, time.monotonic()) if center else None
+            return center
+
+    def invalidate_center(self):
+        with self._center_lock:
+            self._center = None
+
+    def update_pusat(self, token: str, lat: float, lon: float) -> dict:
+        body = {"name": "TITIK PUSAT", "latitude": lat, "longitude": lon}
+        try:
+            return self.request("pusat_update", "PUT", "/location/pusat/update/", token=token, json=body).json()
+        finally:
+            # titik pusat sudah (mungkin) berubah di backend, lookup berikutnya harus ke server
+            self.invalidate_center()
+
+    def nearby_search(self, token: str, lat: float, lon: float, keyword: str, radius: int) -> dict:
+        params = {
+            "q": keyword,
+            "longitude": lon,
+            "latitude": lat,
+            "keyword": keyword,
+            "radius": radius,
+        }
+        data = self.request("nearby_search", "GET", "/locations/nearby/search/", token=token, params=params).json()
+        data["results"] = fill_latlon(data.get("results", []))
+        return data
+
+    def nearby_search_stream(self, token: str, lat: float, lon: float, keyword: str, radius: int,
+                             batch_size: int = STREAM_BATCH_SIZE):
+        """
+        Seperti nearby_search(), tapi menghasilkan list lokasi per batch begitu datang:
+        - respons NDJSON (application/x-ndjson): satu lokasi per baris, dibaca sambil diterima;
+        - respons JSON berhalaman ({"results": [...], "next": url}): tiap halaman satu batch;
+        - respons JSON biasa: seluruh hasil sebagai satu batch.
+        Latency per halaman sampai body habis dibaca dicatat sebagai "nearby_search_stream"
+        (waktu sampai header saja: "nearby_search_headers").
+        """
+        params = {
+            "q": keyword,
+            "longitude": lon,
+            "latitude": lat,
+            "keyword": keyword,
+            "radius": radius,
+            "page_size": batch_size,
+        }
+        headers = {"Accept": "application/x-ndjson, application/json;q=0.9"}
+        path = "/locations/nearby/search/"
+        while path:
+            start = time.perf_counter()
+            response = self.request("nearby_search", "GET", path, token=token, params=params,
+                                    headers=headers, stream=True)
+            ok = False
+            cancelled = False
+            try:
+                with response:
+                    if "ndjson" in response.headers.get("Content-Type", ""):
+                        for batch in _ndjson_batches(response, batch_size):
+                            yield fill_latlon(batch)
+                        ok = True
+                        return
+                    data = response.json()
+                ok = True
+            except GeneratorExit:
+                cancelled = True    # pencarian dibatalkan pemanggil, bukan kegagalan backend
+                raise
+            finally:
+                if not cancelled:
+                    self.record("nearby_search_stream", time.perf_counter() - start, ok)
+            yield fill_latlon(data.get("results", []))
+            path = data.get("next")
+            params = None   # URL halaman berikutnya sudah membawa query-nya sendiri
+
+    def locations_since(self, token: str, updated_since: str = None, page_size: int = 1000):
+        """Lokasi yang berubah sejak updated_since (semua bila None), per halaman; untuk snapshot lokal."""
+        params = {"page_size": page_size}
+        if updated_since:
+            params["updated_since"] = updated_since
+        path = "/locations/"
+        while path:
+            data = self.request("locations_sync", "GET", path, token=token, params=params).json()
+            if isinstance(data, list):
+                yield data
+                return
+            yield data.get("results", [])
+            path = data.get("next")
+            params = None
+
+    def image(self, url: str) -> bytes:
+        return self.request("image", "GET", url).content
+
+
+def _ndjson_batches(response, batch_size: int, flush_interval: float = STREAM_FLUSH_INTERVAL):
+    # batch dikirim bila sudah penuh atau sudah menunggu flush_interval detik; baris dibaca di thread
+    # terpisah supaya flush tetap jalan walau backend sedang diam di tengah stream
+    lines = queue.Queue()
+
+    def read():
+        try:
+            for line in response.iter_lines():
+                if line:
+                    lines.put(line)
+        except Exception as e:  # diteruskan ke pemanggil; termasuk koneksi ditutup saat dibatalkan
+            lines.put(e)
+        lines.put(_END_OF_STREAM)
+
+    threading.Thread(target=read, daemon=True).start()
+    batch = []
+    deadline = None
+    while True:
+        try:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            line = lines.get(timeout=timeout)
+        except queue.Empty:
+            yield batch
+            batch = []
+            deadline = None
+            continue
+        if line is _END_OF_STREAM:
+            break
+        if isinstance(line, Exception):
+            raise line
+        if not batch:
+            deadline = time.monotonic() + flush_interval
+        batch.append(json.loads(line))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+            deadline = None
+    if batch:
+        yield batch
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_api_client(base_url: str = None) -> ApiClient:
+    """ApiClient bersama untuk seluruh aplikasi; base_url diambil dari settings bila diberikan."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ApiClient(base_url or DEFAULT_BASE_URL)
+        elif base_url:
+            _client.base_url = base_url.rstrip("/")
+    return _client
@@ -0,0 +1,55 @@
+"""
+Benchmark pencarian lokasi terdekat: HTTP API (ApiClient) vs query langsung ke PostGIS (PostgisBackend).
+Butuh backend FastAPI dan database PostGIS yang berjalan; token diambil dari login bila diberikan.
+
+Jalankan dari root repo:
+    python bench/bench_backend.py --dsn "dbname=gsi user=postgres host=localhost" \\
+        --username alice --password secret --keyword SMA --radius 6000 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_client import DEFAULT_BASE_URL, ApiClient
+from postgis_backend import DEFAULT_DSN, PostgisBackend
+
+LAT, LON = -7.557924, 110.786439
+
+
+def bench(name, backend, token, args):
+    backend.nearby_search(token, LAT, LON, args.keyword, args.radius)    # pemanasan: koneksi + PREPARE
+    timings = []
+    rows = 0
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        rows = len(backend.nearby_search(token, LAT, LON, args.keyword, args.radius)["results"])
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{name:<8} median: {statistics.median(timings):7.1f} ms   p95: {p95:7.1f} ms   rows: {rows}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--dsn", default=DEFAULT_DSN)
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    parser.add_argument("--keyword", default="SMA")
+    parser.add_argument("--radius", type=int, default=6000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    client = ApiClient(args.base_url)
+    token = None
+    if args.username:
+        token = f"Bearer {client.login(args.username, args.password)['access_token']}"
+
+    bench("http", client, token, args)
+    postgis = PostgisBackend(args.dsn)
+    bench("postgis", postgis, token, args)
+    postgis.close()
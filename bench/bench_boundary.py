@@ -0,0 +1,52 @@
+"""
+Benchmark layer batas kecamatan: load + render folium per refresh,
+versi lama (json.load dari disk tiap kali) vs BoundaryStore.
+
+Jalankan dari root repo:
+    python bench/bench_boundary.py
+"""
+import json
+import os
+import sys
+import time
+
+import folium
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from boundary_store import KECAMATAN_GEOJSON, get_boundary_store
+
+ROUNDS = 10
+
+
+def style(feature):
+    return {"fillColor": "red", "color": "white", "weight": 2, "fillOpacity": 0.1}
+
+
+def render_legacy():
+    with open(KECAMATAN_GEOJSON, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    m = folium.Map(location=[-7.557924, 110.786439], tiles=None)
+    folium.GeoJson(data, name="Batas Kecamatan", style_function=style).add_to(m)
+    return m.get_root().render()
+
+
+def render_store():
+    m = folium.Map(location=[-7.557924, 110.786439], tiles=None)
+    folium.GeoJson(get_boundary_store().geojson, name="Batas Kecamatan", style_function=style).add_to(m)
+    return m.get_root().render()
+
+
+def bench(name, fn):
+    fn()  # warm-up (BoundaryStore load sekali per proses)
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        html = fn()
+    cpu_ms = (time.process_time() - start) * 1000 / ROUNDS
+    print(f"{name:<8} cpu/refresh: {cpu_ms:8.1f} ms   html: {len(html.encode('utf-8')) / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    bench("legacy", render_legacy)
+    bench("store", render_store)
+    print(f"serialized layer: {len(get_boundary_store().to_json()) / 1024:.1f} KiB")
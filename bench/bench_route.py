@@ -0,0 +1,135 @@
+"""
+Benchmark ukuran payload & waktu decode geometri rute: GeoJSON overview=full (cara lama)
+vs polyline6 overview=full vs polyline6 overview=simplified.
+
+Dengan --osrm URL rute diambil dari osrm-routed sungguhan; tanpa itu dipakai rute sintetis
+lintas kota (random walk) yang disederhanakan dengan shapely seperti overview=simplified.
+Decode diukur dengan decoder JS halaman peta di node bila tersedia, kalau tidak dengan Python.
+
+Jalankan dari root repo:
+    python bench/bench_route.py [--osrm http://localhost:5000]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+from shapely.geometry import LineString
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from route_geometry import DECODE_POLYLINE_JS, decode_polyline, encode_polyline
+
+START = (-7.557924, 110.786439)
+END = (-6.966667, 110.416664)   # Solo -> Semarang
+POINTS = 20000
+REPEAT = 50
+
+NODE_BENCH = """
+const fs = require('fs');
+const window = globalThis;
+%s
+const payloads = JSON.parse(fs.readFileSync(process.argv[2], 'utf8'));
+const result = {};
+for (const [name, body] of Object.entries(payloads)) {
+    const start = process.hrtime.bigint();
+    let n = 0;
+    for (let i = 0; i < %d; i++) {
+        const data = JSON.parse(body);
+        const geometry = data.routes[0].geometry;
+        const coords = typeof geometry === 'string'
+            ? GSI.decodePolyline(geometry, 6)
+            : geometry.coordinates.map(c => [c[1], c[0]]);
+        n = coords.length;
+    }
+    result[name] = [Number(process.hrtime.bigint() - start) / 1e6 / %d, n];
+}
+console.log(JSON.stringify(result));
+"""
+
+
+def synthetic_route():
+    random.seed(1)
+    coords = []
+    for i in range(POINTS):
+        t = i / (POINTS - 1)
+        lat = START[0] + (END[0] - START[0]) * t + random.uniform(-0.0004, 0.0004)
+        lon = START[1] + (END[1] - START[1]) * t + random.uniform(-0.0004, 0.0004)
+        coords.append((lat, lon))
+    return coords
+
+
+def route_body(coords, polyline: bool) -> str:
+    geometry = encode_polyline(coords) if polyline else {
+        "type": "LineString", "coordinates": [[round(lon, 6), round(lat, 6)] for lat, lon in coords]
+    }
+    return json.dumps({"code": "Ok", "routes": [{"geometry": geometry, "distance": 1, "duration": 1}]})
+
+
+def synthetic_payloads():
+    full = synthetic_route()
+    simplified = LineString([(lon, lat) for lat, lon in full]).simplify(0.001)
+    simplified = [(lat, lon) for lon, lat in simplified.coords]
+    return {
+        "geojson full": route_body(full, polyline=False),
+        "polyline6 full": route_body(full, polyline=True),
+        "polyline6 simpl": route_body(simplified, polyline=True),
+    }
+
+
+def osrm_payloads(base_url):
+    coords = f"{START[1]},{START[0]};{END[1]},{END[0]}"
+    url = f"{base_url.rstrip('/')}/route/v1/driving/{coords}"
+    return {
+        name: requests.get(f"{url}?overview={overview}&geometries={geometries}", timeout=30).text
+        for name, overview, geometries in (
+            ("geojson full", "full", "geojson"),
+            ("polyline6 full", "full", "polyline6"),
+            ("polyline6 simpl", "simplified", "polyline6"),
+        )
+    }
+
+
+def decode_node(payloads):
+    with tempfile.TemporaryDirectory() as tmp:
+        data = os.path.join(tmp, "payloads.json")
+        script = os.path.join(tmp, "bench.js")
+        with open(data, "w") as f:
+            json.dump(payloads, f)
+        with open(script, "w") as f:
+            f.write(NODE_BENCH % (DECODE_POLYLINE_JS, REPEAT, REPEAT))
+        out = subprocess.run(["node", script, data], capture_output=True, text=True, check=True).stdout
+    return {name: tuple(value) for name, value in json.loads(out).items()}
+
+
+def decode_python(payloads):
+    result = {}
+    for name, body in payloads.items():
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            geometry = json.loads(body)["routes"][0]["geometry"]
+            coords = decode_polyline(geometry) if isinstance(geometry, str) else \
+                [(c[1], c[0]) for c in geometry["coordinates"]]
+        result[name] = ((time.perf_counter() - start) * 1000 / REPEAT, len(coords))
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--osrm", help="URL osrm-routed, mis. http://localhost:5000")
+    args = parser.parse_args()
+
+    payloads = osrm_payloads(args.osrm) if args.osrm else synthetic_payloads()
+    engine = "node" if shutil.which("node") else "python"
+    decoded = decode_node(payloads) if engine == "node" else decode_python(payloads)
+
+    print(f"sumber: {'osrm' if args.osrm else 'sintetis'}, decode: {engine}")
+    for name, body in payloads.items():
+        ms, points = decoded[name]
+        print(f"{name:<16} payload: {len(body.encode()) / 1024:8.1f} KiB   decode: {ms:6.2f} ms   titik: {points}")
@@ -0,0 +1,62 @@
+"""
+Benchmark time-to-first-marker vs time-to-last-marker pencarian lokasi terdekat
+terhadap backend tiruan yang lambat (bench/slow_backend.py, dijalankan di thread).
+Membandingkan JSON utuh (nearby_search) dengan NDJSON dan JSON berhalaman (nearby_search_stream).
+
+Jalankan dari root repo:
+    python bench/bench_stream.py
+"""
+import os
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api_client import ApiClient
+from slow_backend import Handler, State
+
+COUNT = 3000
+LATENCY = 0.3
+ROW_DELAY = 0.0003
+LAT, LON, RADIUS = -7.557924, 110.786439, 6000
+
+
+def bench_full(client):
+    start = time.perf_counter()
+    rows = client.nearby_search("Bearer x", LAT, LON, "SMA", RADIUS)["results"]
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed, len(rows)
+
+
+def bench_stream(client):
+    start = time.perf_counter()
+    first = None
+    rows = 0
+    for batch in client.nearby_search_stream("Bearer x", LAT, LON, "SMA", RADIUS):
+        if first is None:
+            first = time.perf_counter() - start
+        rows += len(batch)
+    return first, time.perf_counter() - start, rows
+
+
+def report(name, result):
+    first, last, rows = result
+    print(f"{name:<8} first marker: {first * 1000:7.0f} ms   last marker: {last * 1000:7.0f} ms   rows: {rows}")
+
+
+if __name__ == "__main__":
+    State.count = COUNT
+    State.latency = LATENCY
+    State.row_delay = ROW_DELAY
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = ApiClient(f"http://127.0.0.1:{server.server_port}")
+
+    report("json", bench_full(client))
+    report("ndjson", bench_stream(client))
+    State.page_size = 250
+    report("paged", bench_stream(client))
+    server.shutdown()
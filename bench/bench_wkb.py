@@ -0,0 +1,53 @@
+"""
+Benchmark decode geometri POINT WKB hex: satu per satu dengan wkb.loads (cara lama)
+vs sekaligus dengan wkb_to_latlon_arrays (shapely.from_wkb + get_x/get_y).
+
+Jalankan dari root repo:
+    python bench/bench_wkb.py
+"""
+import os
+import random
+import sys
+import time
+
+from shapely import wkb
+from shapely.geometry import Point
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_client import wkb_to_latlon_arrays
+
+COUNT = 50000
+INVALID_EVERY = 1000
+
+
+def decode_loop(values):
+    coords = []
+    for value in values:
+        try:
+            geom = wkb.loads(bytes.fromhex(value))
+            coords.append((geom.y, geom.x) if geom.geom_type == "Point" else None)
+        except Exception:
+            coords.append(None)
+    return coords
+
+
+if __name__ == "__main__":
+    random.seed(1)
+    values = [
+        "zz" if i % INVALID_EVERY == 0 else
+        wkb.dumps(Point(110.78 + random.uniform(-.2, .2), -7.55 + random.uniform(-.2, .2)), hex=True)
+        for i in range(COUNT)
+    ]
+
+    start = time.perf_counter()
+    coords = decode_loop(values)
+    loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lats, lons, valid = wkb_to_latlon_arrays(values)
+    batch = time.perf_counter() - start
+
+    assert sum(c is not None for c in coords) == int(valid.sum())
+    print(f"loop   {loop * 1000:7.1f} ms   valid: {sum(c is not None for c in coords)}")
+    print(f"batch  {batch * 1000:7.1f} ms   valid: {int(valid.sum())}   ({loop / batch:.1f}x)")
@@ -0,0 +1,165 @@
+"""
+Backend tiruan yang sengaja lambat, untuk mengukur rendering progresif hasil pencarian
+tanpa backend asli. Melayani /token, /me, /locations/pusat/, /location/pusat/update/
+dan /locations/nearby/search/ dengan lokasi sintetis di sekitar titik pusat.
+
+Format hasil pencarian mengikuti opsi dan header Accept:
+- --page-size N                -> JSON berhalaman ({"results": [...], "next": url}), Accept diabaikan
+                                  (seperti backend yang belum mendukung NDJSON);
+- Accept: application/x-ndjson -> NDJSON, satu lokasi per baris, dikirim bertahap;
+- selain itu                   -> JSON biasa ({"results": [...]}) setelah semua siap.
+
+Jalankan dari root repo, lalu set api_base_url ke http://localhost:8001:
+    python bench/slow_backend.py --count 5000 --latency 0.5 --row-delay 0.0005
+"""
+import argparse
+import json
+import math
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from shapely import wkb
+from shapely.geometry import Point
+
+CATEGORIES = ("Perdagangan", "Perikanan", "Pertanian")
+# Baris NDJSON per chunk HTTP
+STREAM_CHUNK = 50
+
+
+class State:
+    center = (-7.557924, 110.786439)
+    count = 2000
+    latency = 0.5
+    row_delay = 0.0005
+    page_size = 0
+
+
+def synthetic_locations(keyword: str, lat: float, lon: float, radius: float):
+    """Lokasi acak tapi deterministik per keyword, tersebar merata di dalam lingkaran radius."""
+    rng = random.Random(keyword)
+    for i in range(State.count):
+        r = radius * math.sqrt(rng.random())
+        theta = rng.random() * 2 * math.pi
+        d_lat = r * math.cos(theta) / 111320.0
+        d_lon = r * math.sin(theta) / (111320.0 * math.cos(math.radians(lat)))
+        yield {
+            "id": f"{keyword}-{i}",
+            "name": f"{keyword} {CATEGORIES[i % 3]} {i}",
+            "latitude": round(lat + d_lat, 6),
+            "longitude": round(lon + d_lon, 6),
+            "exact_distance_meter": round(r * 1.3, 2),
+            "exact_duration_minute": round(r * 1.3 / 500, 2),
+            "alamat": f"Jl. Contoh No. {i}",
+            "details": {"fasilitas": ["Parkir"], "jam_buka": "08:00", "jam_tutup": "17:00"},
+        }
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def write_chunk(self, rows):
+        time.sleep(State.row_delay * len(rows))
+        data = b"".join(rows)
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.startswith("/token"):
+            self.send_json({"access_token": "stand-in", "token_type": "bearer"})
+        else:
+            self.send_json({"detail": "Not Found"}, 404)
+
+    def do_PUT(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path.startswith("/location/pusat/update/"):
+            State.center = (float(body["latitude"]), float(body["longitude"]))
+            self.send_json({"status": "ok"})
+        else:
+            self.send_json({"detail": "Not Found"}, 404)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/me":
+            self.send_json({"username": "stand-in", "image_profile": ""})
+        elif url.path == "/locations/pusat/":
+            lat, lon = State.center
+            self.send_json({"name": "TITIK PUSAT", "coordinates": wkb.dumps(Point(lon, lat), hex=True)})
+        elif url.path == "/locations/nearby/search/":
+            self.search(url.path, query)
+        else:
+            self.send_json({"detail": "Not Found"}, 404)
+
+    def search(self, path, query):
+        time.sleep(State.latency)
+        keyword = query.get("keyword") or query.get("q") or ""
+        locations = synthetic_locations(
+            keyword, float(query["latitude"]), float(query["longitude"]), float(query["radius"])
+        )
+
+        if not State.page_size and "ndjson" in self.headers.get("Accept", ""):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            # ditulis per STREAM_CHUNK baris: sleep per baris (~0,3 ms) jauh lebih lama dari yang diminta,
+            # jadi NDJSON akan tampak lebih lambat dari JSON biasa hanya karena granularitas sleep
+            rows = []
+            for loc in locations:
+                rows.append(json.dumps(loc).encode("utf-8") + b"\n")
+                if len(rows) >= STREAM_CHUNK:
+                    self.write_chunk(rows)
+                    rows = []
+            if rows:
+                self.write_chunk(rows)
+            self.wfile.write(b"0\r\n\r\n")
+            return
+
+        locations = list(locations)
+        if State.page_size:
+            offset = int(query.get("offset", 0))
+            page = locations[offset:offset + State.page_size]
+            time.sleep(State.row_delay * len(page))
+            next_url = None
+            if offset + State.page_size < len(locations):
+                next_query = dict(query, offset=offset + State.page_size)
+                next_url = f"{path}?{urlencode(next_query)}"
+            self.send_json({"results": page, "next": next_url})
+        else:
+            time.sleep(State.row_delay * len(locations))
+            self.send_json({"results": locations})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--count", type=int, default=State.count, help="jumlah lokasi per pencarian")
+    parser.add_argument("--latency", type=float, default=State.latency, help="jeda sebelum byte pertama (detik)")
+    parser.add_argument("--row-delay", type=float, default=State.row_delay, help="jeda per lokasi (detik)")
+    parser.add_argument("--page-size", type=int, default=0, help="aktifkan JSON berhalaman (menggantikan NDJSON)")
+    args = parser.parse_args()
+    State.count = args.count
+    State.latency = args.latency
+    State.row_delay = args.row_delay
+    State.page_size = args.page_size
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"Backend tiruan di http://127.0.0.1:{args.port} ({args.count} lokasi, latency {args.latency}s)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
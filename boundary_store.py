@@ -0,0 +1,96 @@
+import json
+import threading
+
+KECAMATAN_GEOJSON = "geo_json/33.72_kecamatan.geojson"
+
+# 5 digit desimal ~ 1.1 meter, cukup untuk garis batas kecamatan
+DEFAULT_PRECISION = 5
+
+
+def _quantize_ring(ring, precision):
+    """Buang nilai Z, bulatkan koordinat, dan hapus titik berurutan yang jadi duplikat."""
+    out = []
+    for coord in ring:
+        point = [round(coord[0], precision), round(coord[1], precision)]
+        if not out or out[-1] != point:
+            out.append(point)
+    # ring polygon minimal 4 titik (tertutup); kalau terlalu pendek pakai titik awal saja
+    if len(out) < 4:
+        out = [[round(c[0], precision), round(c[1], precision)] for c in ring]
+    return out
+
+
+def _quantize_geometry(geometry, precision):
+    geom_type = geometry["type"]
+    coords = geometry["coordinates"]
+    if geom_type == "Polygon":
+        coords = [_quantize_ring(ring, precision) for ring in coords]
+    elif geom_type == "MultiPolygon":
+        coords = [[_quantize_ring(ring, precision) for ring in polygon] for polygon in coords]
+    elif geom_type in ("LineString", "MultiPoint"):
+        coords = _quantize_ring(coords, precision)
+    elif geom_type == "MultiLineString":
+        coords = [_quantize_ring(line, precision) for line in coords]
+    elif geom_type == "Point":
+        coords = [round(coords[0], precision), round(coords[1], precision)]
+    return {"type": geom_type, "coordinates": coords}
+
+
+class BoundaryStore:
+    """
+    Data batas wilayah (GeoJSON) yang diparse sekali per proses lalu disimpan dalam bentuk ringkas:
+    tanpa koordinat Z dan dengan presisi koordinat yang dibatasi.
+    """
+
+    def __init__(self, path: str, precision: int = DEFAULT_PRECISION):
+        self.path = path
+        self.precision = precision
+        self._geojson = None
+        self._serialized = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+
+        features = []
+        for feature in raw.get("features", []):
+            features.append({
+                "type": "Feature",
+                "properties": feature.get("properties", {}),
+                "geometry": _quantize_geometry(feature["geometry"], self.precision),
+            })
+        return {"type": "FeatureCollection", "features": features}
+
+    @property
+    def geojson(self) -> dict:
+        """FeatureCollection ringkas (dipakai bersama, jangan dimodifikasi)."""
+        if self._geojson is None:
+            with self._lock:
+                if self._geojson is None:
+                    self._geojson = self._load()
+        return self._geojson
+
+    def to_json(self) -> str:
+        """Hasil serialisasi layer, dibuat sekali lalu dicache."""
+        if self._serialized is None:
+            data = self.geojson
+            with self._lock:
+                if self._serialized is None:
+                    self._serialized = json.dumps(data, separators=(",", ":"))
+        return self._serialized
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_boundary_store(path: str = KECAMATAN_GEOJSON, precision: int = DEFAULT_PRECISION) -> BoundaryStore:
+    """Ambil BoundaryStore bersama untuk file & presisi yang sama (satu kali load per proses)."""
+    key = (path, precision)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = BoundaryStore(path, precision)
+            _stores[key] = store
+    return store
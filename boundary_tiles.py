@@ -0,0 +1,190 @@
+import json
+import math
+import re
+import threading
+from functools import lru_cache
+
+import shapely
+from folium.map import Layer
+from folium.template import Template
+from shapely.geometry import shape, mapping
+
+from boundary_store import get_boundary_store
+
+# (zoom maksimum, toleransi Douglas-Peucker dalam derajat); ~setengah pixel di zoom tersebut
+PYRAMID_LEVELS = (
+    (10, 0.001),
+    (12, 0.0003),
+    (14, 0.00008),
+    (16, 0.00002),
+    (None, 0.0),
+)
+
+TILE_URL = "/tiles/kecamatan/{z}/{x}/{y}.geojson"
+TILE_PATH_RE = re.compile(r"^/tiles/kecamatan/(\d+)/(\d+)/(\d+)\.geojson$")
+
+
+def tile_bounds(z: int, x: int, y: int):
+    """Bounding box (min_lon, min_lat, max_lon, max_lat) untuk tile slippy map z/x/y."""
+    n = 2 ** z
+
+    def lat(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def level_for_zoom(z: int) -> int:
+    for i, (max_zoom, _) in enumerate(PYRAMID_LEVELS):
+        if max_zoom is None or z <= max_zoom:
+            return i
+    return len(PYRAMID_LEVELS) - 1
+
+
+class BoundaryPyramid:
+    """
+    Piramida multi-resolusi dari BoundaryStore: tiap level disederhanakan sekali (Douglas-Peucker),
+    lalu dipotong per tile z/x/y sehingga browser hanya mengambil detail yang dibutuhkan zoom saat itu.
+    Polygon dikirim sebagai isi (fill) dan garis batas dikirim terpisah supaya potongan tile
+    tidak tergambar sebagai garis batas.
+    """
+
+    def __init__(self, store=None):
+        self.store = store or get_boundary_store()
+        self._levels = {}
+        self._lock = threading.Lock()
+        self.tile = lru_cache(maxsize=2048)(self._tile)
+
+    def _build_level(self, index: int):
+        tolerance = PYRAMID_LEVELS[index][1]
+        properties = []
+        fills = []
+        for feature in self.store.geojson["features"]:
+            geom = shape(feature["geometry"])
+            if tolerance:
+                geom = geom.simplify(tolerance, preserve_topology=True)
+            properties.append(feature.get("properties", {}))
+            fills.append(geom)
+
+        # buffer(0) memperbaiki polygon yang jadi invalid setelah disederhanakan
+        fills = [geom if geom.is_valid else geom.buffer(0) for geom in fills]
+        lines = shapely.boundary(fills)
+        return {
+            "properties": properties,
+            "fills": fills,
+            "lines": lines,
+            "tree": shapely.STRtree(fills),
+        }
+
+    def level(self, index: int):
+        if index not in self._levels:
+            with self._lock:
+                if index not in self._levels:
+                    self._levels[index] = self._build_level(index)
+        return self._levels[index]
+
+    def _tile(self, z: int, x: int, y: int) -> str:
+        level = self.level(level_for_zoom(z))
+        min_lon, min_lat, max_lon, max_lat = bounds = tile_bounds(z, x, y)
+
+        features = []
+        for i in level["tree"].query(shapely.box(*bounds)):
+            props = level["properties"][i]
+            for kind, geoms in (("fill", level["fills"]), ("line", level["lines"])):
+                clipped = shapely.clip_by_rect(geoms[i], min_lon, min_lat, max_lon, max_lat)
+                if clipped.is_empty:
+                    continue
+                clipped = shapely.set_precision(clipped, 10 ** -self.store.precision)
+                features.append({
+                    "type": "Feature",
+                    "properties": dict(props, kind=kind),
+                    "geometry": mapping(clipped),
+                })
+
+        return json.dumps({"type": "FeatureCollection", "features": features}, separators=(",", ":"))
+
+
+_pyramid = None
+_pyramid_lock = threading.Lock()
+
+
+def get_boundary_pyramid() -> BoundaryPyramid:
+    global _pyramid
+    with _pyramid_lock:
+        if _pyramid is None:
+            _pyramid = BoundaryPyramid()
+    return _pyramid
+
+
+class BoundaryTileLayer(Layer):
+    """
+    Layer Leaflet (L.GridLayer) yang memuat batas kecamatan per tile z/x/y dari server lokal.
+    """
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            if (!window.GSIBoundaryTiles) {
+                window.GSIBoundaryTiles = L.GridLayer.extend({
+                    initialize: function(url, fillStyle, lineStyle, options) {
+                        L.GridLayer.prototype.initialize.call(this, options);
+                        this._url = url;
+                        this._fillStyle = fillStyle;
+                        this._lineStyle = lineStyle;
+                        this._vectors = {};
+                        this._group = L.featureGroup();
+                        this.on('tileunload', (e) => {
+                            const key = this._tileCoordsToKey(e.coords);
+                            if (this._vectors[key]) {
+                                this._group.removeLayer(this._vectors[key]);
+                                delete this._vectors[key];
+                            }
+                        });
+                    },
+                    onAdd: function(map) {
+                        L.GridLayer.prototype.onAdd.call(this, map);
+                        this._group.addTo(map);
+                    },
+                    onRemove: function(map) {
+                        map.removeLayer(this._group);
+                        L.GridLayer.prototype.onRemove.call(this, map);
+                    },
+                    createTile: function(coords, done) {
+                        const tile = document.createElement('div');
+                        const key = this._tileCoordsToKey(coords);
+                        const url = L.Util.template(this._url, coords);
+                        fetch(url)
+                            .then((res) => res.json())
+                            .then((data) => {
+                                if (!this._tiles[key]) {
+                                    return;  // tile sudah di-unload sebelum data datang
+                                }
+                                this._vectors[key] = L.geoJSON(data, {
+                                    interactive: false,
+                                    style: (f) => f.properties.kind === 'line' ? this._lineStyle : this._fillStyle
+                                }).addTo(this._group);
+                                done(null, tile);
+                            })
+                            .catch((err) => done(err, tile));
+                        return tile;
+                    }
+                });
+            }
+            var {{ this.get_name() }} = new GSIBoundaryTiles(
+                {{ this.url|tojson }},
+                {{ this.fill_style|tojson }},
+                {{ this.line_style|tojson }},
+                {{ this.options|tojavascript }}
+            );
+        {% endmacro %}
+        """
+    )
+
+    def __init__(self, url: str = TILE_URL, name: str = "Batas Kecamatan",
+                 fill_style=None, line_style=None, overlay: bool = True,
+                 control: bool = True, show: bool = True, **kwargs):
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = "BoundaryTileLayer"
+        self.url = url
+        self.fill_style = fill_style or {"stroke": False, "fillColor": "red", "fillOpacity": 0.1}
+        self.line_style = line_style or {"color": "white", "weight": 2}
+        self.options = dict(kwargs)
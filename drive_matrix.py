@@ -0,0 +1,104 @@
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from osrm_proxy import COORD_PRECISION, get_osrm_proxy
+
+# osrm-routed default --max-table-size 100: satu sumber + 99 tujuan per request /table
+TABLE_CHUNK = 99
+MAX_PARALLEL_TABLES = 4
+TABLE_QUERY = "sources=0&annotations=duration,distance"
+
+
+class DriveTimeMatrix:
+    """
+    Waktu tempuh & jarak lewat jalan dari titik pusat ke semua hasil pencarian, diambil dengan OSRM /table
+    (satu request per TABLE_CHUNK tujuan, lewat OsrmProxy). Hasil per pasangan (pusat, lokasi) disimpan di LRU,
+    jadi refresh atau tambahan hasil hanya meminta tujuan yang belum pernah dihitung.
+    """
+
+    def __init__(self, proxy, max_entries: int = 50000):
+        self.proxy = proxy
+        self.max_entries = max_entries
+        self._pairs = OrderedDict()     # (pusat, key lokasi) -> (durasi menit, jarak meter) atau None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def origin(lat: float, lon: float):
+        return round(lat, COORD_PRECISION), round(lon, COORD_PRECISION)
+
+    def cached(self, lat: float, lon: float, points):
+        """Pisahkan points [(key, lat, lon)] jadi ({key: (menit, meter)} yang sudah diketahui, points sisanya)."""
+        origin = self.origin(lat, lon)
+        known = {}
+        missing = []
+        with self._lock:
+            for point in points:
+                pair = (origin, point[0])
+                if pair in self._pairs:
+                    self._pairs.move_to_end(pair)
+                    if self._pairs[pair] is not None:
+                        known[point[0]] = self._pairs[pair]
+                else:
+                    missing.append(point)
+        return known, missing
+
+    def compute(self, lat: float, lon: float, points, progress=None, cancel=None):
+        """
+        {key: (durasi menit, jarak meter atau None)} untuk points [(key, lat, lon)]; lokasi yang tidak
+        terjangkau lewat jalan tidak ikut. progress(dict) dipanggil per chunk supaya hasil bisa langsung ditampilkan.
+        """
+        known, missing = self.cached(lat, lon, points)
+        chunks = [missing[i:i + TABLE_CHUNK] for i in range(0, len(missing), TABLE_CHUNK)]
+        if not chunks:
+            return known
+
+        with ThreadPoolExecutor(max_workers=min(len(chunks), MAX_PARALLEL_TABLES)) as pool:
+            futures = [pool.submit(self._table, lat, lon, chunk) for chunk in chunks]
+            try:
+                for future in as_completed(futures):
+                    found = future.result()
+                    known.update(found)
+                    if progress and found:
+                        progress(found)
+                    if cancel:
+                        cancel.check()
+            finally:
+                for future in futures:
+                    future.cancel()
+        return known
+
+    def _table(self, lat: float, lon: float, chunk):
+        coords = ";".join([f"{lon},{lat}"] + [f"{p_lon},{p_lat}" for _, p_lat, p_lon in chunk])
+        data = json.loads(self.proxy.fetch("table", "driving", coords, TABLE_QUERY))
+        if data.get("code") != "Ok":
+            raise ValueError(f"OSRM table gagal: {data.get('message', data.get('code'))}")
+
+        durations = data["durations"][0][1:]
+        distances = (data.get("distances") or [[None] * (len(chunk) + 1)])[0][1:]
+        origin = self.origin(lat, lon)
+        found = {}
+        with self._lock:
+            for (key, _, _), duration, distance in zip(chunk, durations, distances):
+                value = None
+                if duration is not None:
+                    value = (duration / 60, distance)
+                    found[key] = value
+                self._pairs[(origin, key)] = value
+                self._pairs.move_to_end((origin, key))
+            while len(self._pairs) > self.max_entries:
+                self._pairs.popitem(last=False)
+        return found
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def get_drive_matrix(proxy=None) -> DriveTimeMatrix:
+    global _matrix
+    with _matrix_lock:
+        if _matrix is None:
+            _matrix = DriveTimeMatrix(proxy or get_osrm_proxy())
+    return _matrix
@@ -0,0 +1,56 @@
+import time
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+
+# Pusat dianggap sama bila bergeser kurang dari ini (meter)
+CENTER_TOLERANCE_M = 1.0
+
+
+def haversine_m(lat: float, lon: float, lats, lons) -> np.ndarray:
+    """Jarak great-circle (meter) dari (lat, lon) ke setiap titik (lats, lons), tervektorisasi."""
+    lat1 = np.radians(lat)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(lons, dtype=np.float64) - lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class ResultSet:
+    """
+    Hasil pencarian terakhir beserta radius saat di-fetch. Pencarian ulang dengan keyword & pusat
+    yang sama dan radius lebih kecil cukup difilter lokal dari sini, tanpa request ke backend.
+    """
+
+    def __init__(self, keyword: str, lat: float, lon: float, radius: float, locations):
+        self.keyword = (keyword or "").strip().lower()
+        self.lat = lat
+        self.lon = lon
+        self.radius = radius
+        self.locations = locations
+        self.fetched_at = time.time()
+
+        lats = np.array([_coord(loc, "latitude") for loc in locations], dtype=np.float64)
+        lons = np.array([_coord(loc, "longitude") for loc in locations], dtype=np.float64)
+        # lokasi tanpa koordinat (NaN) tidak pernah lolos filter radius
+        self.distances = np.nan_to_num(haversine_m(lat, lon, lats, lons), nan=np.inf)
+
+    def covers(self, keyword: str, lat: float, lon: float, radius: float, max_age: float) -> bool:
+        if (keyword or "").strip().lower() != self.keyword or radius > self.radius:
+            return False
+        if time.time() - self.fetched_at > max_age:
+            return False
+        return haversine_m(self.lat, self.lon, [lat], [lon])[0] <= CENTER_TOLERANCE_M
+
+    def within(self, radius: float):
+        return [self.locations[i] for i in np.flatnonzero(self.distances <= radius)]
+
+
+def _coord(loc, field):
+    value = loc.get(field)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
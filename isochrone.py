@@ -0,0 +1,103 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import shapely
+from shapely.geometry import mapping
+
+from drive_matrix import get_drive_matrix
+
+ISOCHRONE_MINUTES = (5, 10, 15)
+# Titik grid per sisi: 40 -> 1600 titik (17 request /table); lebih kecil lebih cepat tapi lebih kasar
+DEFAULT_GRID_SIZE = 40
+# Batas area sampel: titik lebih jauh dari max menit x kecepatan ini (garis lurus) dianggap tak terjangkau
+MAX_SPEED_M_PER_MIN = 1000.0
+
+METERS_PER_DEGREE = 111320.0
+
+
+def parse_minutes(text) -> tuple:
+    """'5, 10,15' -> (5, 10, 15)"""
+    minutes = sorted({int(m) for m in str(text).split(",") if m.strip().isdigit() and int(m) > 0})
+    return tuple(minutes) or ISOCHRONE_MINUTES
+
+
+def sample_grid(lat: float, lon: float, half_width: float, size: int):
+    """Grid size x size titik (lats, lons) di sekitar pusat, plus ukuran sel (dlat, dlon) dalam derajat."""
+    half_lat = half_width / METERS_PER_DEGREE
+    half_lon = half_width / (METERS_PER_DEGREE * max(np.cos(np.radians(lat)), 1e-6))
+    lats, lons = np.meshgrid(
+        np.linspace(lat - half_lat, lat + half_lat, size),
+        np.linspace(lon - half_lon, lon + half_lon, size),
+        indexing="ij",
+    )
+    return lats, lons, 2 * half_lat / (size - 1), 2 * half_lon / (size - 1)
+
+
+def contour(lats, lons, minutes, thresholds, dlat: float, dlon: float):
+    """
+    Poligon isochrone per ambang menit dari grid waktu tempuh: sel grid yang terjangkau digabung
+    (union), lalu tepinya yang bergerigi dihaluskan dengan closing buffer dan disederhanakan.
+    """
+    smooth = min(dlat, dlon) * 0.5
+    features = []
+    for threshold in thresholds:
+        reachable = np.nan_to_num(minutes, nan=np.inf) <= threshold
+        if not reachable.any():
+            continue
+        cells = shapely.box(lons[reachable] - dlon / 2, lats[reachable] - dlat / 2,
+                            lons[reachable] + dlon / 2, lats[reachable] + dlat / 2)
+        area = shapely.union_all(cells).buffer(smooth, quad_segs=4).buffer(-smooth, quad_segs=4)
+        area = area.simplify(smooth / 2)
+        if area.is_empty:
+            continue
+        features.append({"type": "Feature", "properties": {"minutes": threshold}, "geometry": mapping(area)})
+    return {"type": "FeatureCollection", "features": features}
+
+
+class IsochroneBuilder:
+    """
+    Isochrone waktu tempuh dari titik pusat: grid titik di sekitar pusat diukur waktu tempuhnya lewat
+    OSRM /table (DriveTimeMatrix, per chunk), lalu dikontur per ambang menit dengan numpy + shapely.
+    Hasil disimpan per (pusat, menit, ukuran grid), jadi refresh dengan pusat yang sama tidak menghitung ulang.
+    """
+
+    def __init__(self, matrix=None, max_entries: int = 16):
+        self.matrix = matrix or get_drive_matrix()
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def build(self, lat: float, lon: float, minutes=ISOCHRONE_MINUTES, grid_size: int = DEFAULT_GRID_SIZE,
+              cancel=None) -> dict:
+        """GeoJSON FeatureCollection, satu Feature (Polygon/MultiPolygon) per ambang menit."""
+        minutes = tuple(sorted(minutes))
+        key = (*self.matrix.origin(lat, lon), minutes, grid_size)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        lats, lons, dlat, dlon = sample_grid(lat, lon, minutes[-1] * MAX_SPEED_M_PER_MIN, grid_size)
+        points = [(f"iso:{p_lat:.5f},{p_lon:.5f}", p_lat, p_lon) for p_lat, p_lon in zip(lats.ravel(), lons.ravel())]
+        times = self.matrix.compute(lat, lon, points, cancel=cancel)
+        grid = np.array([times[key][0] if key in times else np.nan for key, _, _ in points]).reshape(lats.shape)
+
+        result = contour(lats, lons, grid, minutes, dlat, dlon)
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return result
+
+
+_builder = None
+_builder_lock = threading.Lock()
+
+
+def get_isochrone_builder() -> IsochroneBuilder:
+    global _builder
+    with _builder_lock:
+        if _builder is None:
+            _builder = IsochroneBuilder()
+    return _builder
@@ -0,0 +1,193 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from geo_filter import haversine_m
+
+DEFAULT_SNAPSHOT_PATH = os.path.join("cache", "locations.sqlite")
+
+# Tanpa OSRM jarak riil tidak diketahui; durasi diperkirakan dari jarak lurus dengan kecepatan ini
+ESTIMATED_SPEED_M_PER_MIN = 500.0
+# Ditandai pada lokasi yang jarak/durasinya perkiraan garis lurus, bukan hasil OSRM dari backend
+ESTIMATED_FIELD = "distance_estimated"
+
+
+class LocalSearchEngine:
+    """
+    Snapshot tabel lokasi di SQLite dengan index R-tree, untuk menjawab pencarian
+    keyword + radius seperti /locations/nearby/search/ saat backend tidak bisa dihubungi.
+    Snapshot diisi dari setiap hasil pencarian backend dan dari sync incremental (updated_at).
+    Bentuk hasil sama dengan backend (latitude, longitude, alamat, details, ...), hanya saja
+    jarak & durasi adalah perkiraan garis lurus.
+    """
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # satu thread penulis: upsert_later() tidak menahan pencarian, dan penulisan tetap berurutan
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-upsert")
+        self.sync_supported = True
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        db = self._db()
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS locations (
+                rid INTEGER PRIMARY KEY,
+                id TEXT UNIQUE NOT NULL,
+                search_text TEXT NOT NULL,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                updated_at TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS locations_rtree USING rtree(rid, min_lat, max_lat, min_lon, max_lon);
+        """)
+        db.commit()
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    @property
+    def count(self) -> int:
+        return self._db().execute("SELECT COUNT(*) FROM locations").fetchone()[0]
+
+    def upsert(self, locations) -> int:
+        """Simpan / perbarui lokasi; baris dengan updated_at lebih lama dari snapshot diabaikan."""
+        db = self._db()
+        stored = 0
+        with self._lock:
+            for loc in locations:
+                try:
+                    lat = float(loc["latitude"])
+                    lon = float(loc["longitude"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                loc_id = loc.get("id")
+                loc_id = str(loc_id) if loc_id is not None else f"{lat:.6f},{lon:.6f},{loc.get('name')}"
+                updated_at = loc.get("updated_at")
+
+                row = db.execute("SELECT rid, updated_at FROM locations WHERE id=?", (loc_id,)).fetchone()
+                if row and updated_at and row[1] and str(updated_at) < row[1]:
+                    continue
+                # field hasil hitungan per pencarian tidak ikut disimpan
+                data = {k: v for k, v in loc.items()
+                        if k not in ("exact_distance_meter", "exact_duration_minute", "search_keyword", ESTIMATED_FIELD)}
+                search_text = f"{loc.get('name', '')} {loc.get('alamat', '')}".lower()
+                values = (search_text, lat, lon, str(updated_at) if updated_at else None, json.dumps(data))
+                if row:
+                    db.execute(
+                        "UPDATE locations SET search_text=?, latitude=?, longitude=?, updated_at=?, data=? WHERE rid=?",
+                        values + (row[0],),
+                    )
+                    db.execute("UPDATE locations_rtree SET min_lat=?, max_lat=?, min_lon=?, max_lon=? WHERE rid=?",
+                               (lat, lat, lon, lon, row[0]))
+                else:
+                    rid = db.execute(
+                        "INSERT INTO locations (id, search_text, latitude, longitude, updated_at, data) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (loc_id,) + values,
+                    ).lastrowid
+                    db.execute("INSERT INTO locations_rtree VALUES (?, ?, ?, ?, ?)", (rid, lat, lat, lon, lon))
+                stored += 1
+            db.commit()
+        return stored
+
+    def upsert_later(self, locations):
+        """upsert() di thread penulis; dipakai dari jalur pencarian supaya hasil tidak menunggu SQLite."""
+        future = self._writer.submit(self.upsert, list(locations))
+        future.add_done_callback(
+            lambda f: f.exception() and print(f"Gagal menyimpan ke snapshot lokasi lokal: {f.exception()}")
+        )
+        return future
+
+    def nearby_search(self, token, lat: float, lon: float, keyword: str, radius: float) -> dict:
+        """Pengganti ApiClient.nearby_search: bbox lewat R-tree, lalu filter haversine & keyword."""
+        dlat = radius / 111320.0
+        dlon = radius / (111320.0 * max(math.cos(math.radians(lat)), 1e-6))
+        rows = self._db().execute(
+            """
+            SELECT l.latitude, l.longitude, l.data FROM locations_rtree r
+            JOIN locations l ON l.rid = r.rid
+            WHERE r.min_lat >= ? AND r.max_lat <= ? AND r.min_lon >= ? AND r.max_lon <= ?
+              AND instr(l.search_text, ?) > 0
+            """,
+            (lat - dlat, lat + dlat, lon - dlon, lon + dlon, (keyword or "").strip().lower()),
+        ).fetchall()
+        if not rows:
+            return {"results": []}
+
+        distances = haversine_m(lat, lon, [r[0] for r in rows], [r[1] for r in rows])
+        results = []
+        for i in np.argsort(distances):
+            if distances[i] > radius:
+                break
+            loc = json.loads(rows[i][2])
+            loc["exact_distance_meter"] = float(distances[i])
+            loc["exact_duration_minute"] = float(distances[i]) / ESTIMATED_SPEED_M_PER_MIN
+            loc[ESTIMATED_FIELD] = True
+            results.append(loc)
+        return {"results": results}
+
+    def nearby_search_stream(self, token, lat, lon, keyword, radius, batch_size=None):
+        yield self.nearby_search(token, lat, lon, keyword, radius)["results"]
+
+    def sync(self, api, token: str) -> int:
+        """
+        Sync incremental: ambil lokasi yang berubah sejak updated_at terbaru dari sync sebelumnya.
+        Bila backend belum punya endpoint sync, snapshot tetap terisi dari hasil pencarian.
+        """
+        if not self.sync_supported:
+            return 0
+        db = self._db()
+        # watermark sendiri, bukan MAX(updated_at) tabel: baris dari hasil pencarian bisa lebih baru
+        # dari perubahan lain yang belum pernah di-sync
+        row = db.execute("SELECT value FROM meta WHERE name='sync_watermark'").fetchone()
+        since = row[0] if row else None
+        watermark = since
+        stored = 0
+        try:
+            for batch in api.locations_since(token, since):
+                stored += self.upsert(batch)
+                for loc in batch:
+                    updated_at = loc.get("updated_at")
+                    if updated_at and (watermark is None or str(updated_at) > watermark):
+                        watermark = str(updated_at)
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code in (404, 405):
+                print("Backend tidak menyediakan endpoint sync lokasi, snapshot diisi dari hasil pencarian")
+                self.sync_supported = False
+                return stored
+            raise
+        # watermark baru disimpan setelah semua halaman diterima; sync yang terputus diulang dari awal
+        if watermark is not None:
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('sync_watermark', ?)", (watermark,))
+        db.execute("INSERT OR REPLACE INTO meta VALUES ('last_sync', ?)", (str(time.time()),))
+        db.commit()
+        return stored
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_local_engine(path: str = DEFAULT_SNAPSHOT_PATH) -> LocalSearchEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = LocalSearchEngine(path)
+    return _engine
@@ -1,11 +1,8 @@
-import json
-import os
 import random
-import socket
 import sys
 import threading
-from contextlib import closing
-from http.server import SimpleHTTPRequestHandler, HTTPServer
+import time
+import uuid
 
 import folium
 import requests
@@ -16,19 +13,30 @@ from PySide6.QtWebEngineWidgets import QWebEngineView
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QFrame, QStackedWidget, QScrollArea, QButtonGroup, QDialog, QFormLayout, QLineEdit, QSpinBox,
-    QDialogButtonBox, QMessageBox, QGraphicsDropShadowEffect
+    QDialogButtonBox, QMessageBox, QGraphicsDropShadowEffect, QCheckBox
 )
-from shapely import wkb
 
 from GSITitleBar import QSITitleBar
-
-
-class CORSRequestHandler(SimpleHTTPRequestHandler):
-    def end_headers(self):
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET')
-        self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate')
-        super().end_headers()
+from api_client import DEFAULT_BASE_URL, get_api_client
+from boundary_tiles import BoundaryTileLayer, TILE_PATH_RE, get_boundary_pyramid
+from drive_matrix import get_drive_matrix
+from isochrone import DEFAULT_GRID_SIZE as ISOCHRONE_GRID_SIZE, ISOCHRONE_MINUTES, get_isochrone_builder, parse_minutes
+from local_engine import ESTIMATED_FIELD, get_local_engine
+from map_bridge import MapBridge, BridgeScript, attach_bridge
+from osrm_proxy import DEFAULT_CACHE_PATH as OSRM_CACHE_PATH, DEFAULT_OSRM_URL, OSRM_PATH_RE, get_osrm_proxy, osrm_resource
+from postgis_backend import DEFAULT_DSN, PostgisError, get_postgis_backend
+from results_layer import RESULT_FIELDS, ResultLayerScript
+from route_geometry import DECODE_POLYLINE_JS, ROUTE_DETAIL_ZOOM
+from scheme_handler import LONG_CACHE, get_scheme_handler, register_scheme
+from search_cache import DEFAULT_CACHE_PATH as SEARCH_CACHE_PATH, get_search_cache
+from search_job import KEYWORD_FIELD, SearchJob, split_keywords
+from tile_cache import MAP_TILE_PATH_RE, TILE_URL, get_tile_cache, tile_resource
+from vendor_assets import ASSET_PATH_RE, get_asset_bundle
+from viewport_loader import (
+    MAX_VIEWPORT_TILES, VIEWPORT_MIN_ZOOM, VIEWPORT_THREADS, VIEWPORT_TILE_ZOOM, ViewportTileCache,
+    fetch_tile_locations, measure_from, viewport_tiles
+)
+from workers import TaskRunner
 
 
 class MWebEnginePage(QWebEnginePage):
@@ -113,7 +121,7 @@ class LocationInputDialog(QDialog):
         # Input keyword
         self.keyword = QLineEdit(str(self.default_key) if self.default_key else "")
         self.keyword.setPlaceholderText("Input keyword...")
-        self.keyword.setToolTip("Input keyword untuk pencarian titik")
+        self.keyword.setToolTip("Input keyword untuk pencarian titik, pisahkan dengan koma untuk beberapa keyword")
         self.keyword.setStyleSheet("""
             QLineEdit {
                 background-color: #3d3d3d;
@@ -219,20 +227,13 @@ class LocationInputDialog(QDialog):
         self.button_box.rejected.connect(self.reject)
         layout.addWidget(self.button_box)
 
-def wkbhex_to_latlon(wkb_hex: str):
-    """
-    Konversi WKB HEX POINT ke (latitude, longitude).
-    """
-    try:
-        geom = wkb.loads(bytes.fromhex(wkb_hex))
-        if geom.geom_type != "Point":
-            raise ValueError("Geometry bukan POINT")
-
-        xlon, xlat = geom.x, geom.y
-        return xlat, xlon
-    except Exception as e:
-        print("Input Salah:", e)
-        return None
+SUBMIT_TEXT = "Klik disini untuk refresh map & mencari Lokasi"
+VIEWPORT_LABEL = "Muat lokasi mengikuti area peta saat digeser"
+# Kolom durasi & jarak di baris hasil (RESULT_FIELDS), diganti hasil OSRM /table
+DURATION_COLUMN = RESULT_FIELDS.index("duration")
+DISTANCE_COLUMN = RESULT_FIELDS.index("distance")
+ESTIMATED_COLUMN = RESULT_FIELDS.index("estimated")
+
 
 class MapWidget(QWidget):
     def __init__(self, parent=None):
@@ -248,14 +249,47 @@ class MapWidget(QWidget):
             "last_rad": 6000,
             "last_token": "unauthorized",
             "last_image_profile": "https://www.python.org/static/community_logos/python-logo.png",
-            "last_username": "Alice"
+            "last_username": "Alice",
+            "tile_cache_mb": 512,
+            "tile_prefetch_min_zoom": 12,
+            "tile_prefetch_max_zoom": 16,
+            "api_base_url": DEFAULT_BASE_URL,
+            "pusat_ttl": 60,
+            "search_cache_ttl": 300,
+            "search_cache_disk": True,
+            "viewport_mode": False,
+            "local_engine": True,
+            "search_backend": "http",
+            "postgis_dsn": DEFAULT_DSN,
+            "osrm_url": DEFAULT_OSRM_URL,
+            "osrm_cache_disk": True,
+            "drive_time_matrix": True,
+            "isochrone": True,
+            "isochrone_minutes": ",".join(str(m) for m in ISOCHRONE_MINUTES),
+            "isochrone_grid": ISOCHRONE_GRID_SIZE
         }
         for key, value in defaults.items():
             if self.settings.value(key) is None:
                 self.settings.setValue(key, value)
 
+        self.api = get_api_client(self.settings.value("api_base_url"))
+        self.api.center_ttl = self.settings.value("pusat_ttl", type=int)
+        self.search_backend = self.create_search_backend()
+
+        # Cache hasil pencarian (LRU memori + SQLite), dipakai juga saat backend lambat/mati
+        self.search_cache = get_search_cache(
+            SEARCH_CACHE_PATH if self.settings.value("search_cache_disk", type=bool) else None,
+            ttl=self.settings.value("search_cache_ttl", type=int)
+        )
+        # Rute OSRM diambil lewat proxy lokal gsi://app/osrm/... yang menyimpan hasilnya
+        self.osrm_proxy = get_osrm_proxy(self.settings.value("osrm_url"),
+                                         OSRM_CACHE_PATH if self.settings.value("osrm_cache_disk", type=bool) else None)
+        # Snapshot lokasi lokal (SQLite + R-tree) untuk pencarian saat backend mati
+        self.local_engine = get_local_engine() if self.settings.value("local_engine", type=bool) else None
+
         self.first_titik_pusat = None
-        self.server_port = 0
+        self.scheme = None
+        self.map_path = f"/map/{uuid.uuid4().hex}.html"
         self.browser = None
         self.submit_btn = None
         self.form_layout = None
@@ -265,30 +299,51 @@ class MapWidget(QWidget):
 
         self.m = None
         self.current_zoom = 14
-
-        # Setup server
-        self.server_port = self.find_free_port()
-        self.server_thread = threading.Thread(target=self.run_server, daemon=True)
-        self.server_thread.start()
+        self.bridge = None
+        self.circle_layer = None
+        self.locations_feature_group = None
+        self.layer_control = None
+
+        # State yang sedang tampil di halaman peta (dikirim ulang bila halaman direload)
+        self._center_state = None
+        self._shown_results = {}
+        self._result_levels = {}
+        # Waktu tempuh riil (OSRM /table) dari titik pusat saat ini: key lokasi -> (menit, meter)
+        self._drive_times = {}
+        self._drive_origin = None
+        self._isochrone_state = None
+        # Hasil fetch terakhir per keyword; radius yang lebih kecil difilter lokal dari sini
+        self._result_sets = {}
+
+        # Mode area peta: lokasi dimuat per tile area pandang, tile yang sudah dimuat dicache
+        self._viewport = None
+        self._viewport_tiles = ViewportTileCache()
+        self._viewport_loading = set()
+
+        self._prefetch_key = None
+        self._prefetch_cancel = None
+
+        # Request backend & render folium dijalankan di QThreadPool, bukan di UI thread
+        self.tasks = TaskRunner(self)
+        self.viewport_tasks = TaskRunner(self, max_threads=VIEWPORT_THREADS)
+        self._map_requested = False
+
+        # Cache tile lokal (SQLite) dengan batas ukuran dari settings
+        get_tile_cache(max_bytes=self.settings.value("tile_cache_mb", type=int) * 1024 * 1024)
 
         # UI Setup
         self.setup_ui()
 
         # Generate initial map
         QTimer.singleShot(100, self.generate_map)
+        QTimer.singleShot(500, self.sync_local_engine)
+        # ringkasan hanya untuk instance yang memang dibuat jendela ini (tidak ada bila keluar dari login)
+        QApplication.instance().aboutToQuit.connect(self.print_summaries)
 
-    def find_free_port(self):
-        with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
-            s.bind(('', 0))
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.server_port = s.getsockname()[1]
-            return s.getsockname()[1]
-
-    def run_server(self):
-        server_address = ('', self.server_port)
-        httpd = HTTPServer(server_address, CORSRequestHandler)
-        print(f"Server berjalan di port {self.server_port}")
-        httpd.serve_forever()
+    def print_summaries(self):
+        print(self.api.metrics_summary())
+        print(self.search_cache.summary())
+        print(self.osrm_proxy.summary())
 
     def setup_ui(self):
         self.main_layout = QVBoxLayout(self)
@@ -301,7 +356,7 @@ class MapWidget(QWidget):
         self.form_layout.setSpacing(0)
         self.form_layout.setContentsMargins(0,0,0,0)
 
-        self.submit_btn = QPushButton("Klik disini untuk refresh map & mencari Lokasi")
+        self.submit_btn = QPushButton(SUBMIT_TEXT)
         self.submit_btn.clicked.connect(self.open_dialog)
         self.submit_btn.setStyleSheet("""
             QPushButton{
@@ -312,39 +367,58 @@ class MapWidget(QWidget):
                 }"""
         )
         self.form_layout.addRow(self.submit_btn)
+
+        self.viewport_check = QCheckBox(VIEWPORT_LABEL)
+        self.viewport_check.setChecked(self.settings.value("viewport_mode", type=bool))
+        self.viewport_check.toggled.connect(self.toggle_viewport_mode)
+        self.viewport_check.setStyleSheet("QCheckBox{ color: #ffffff; background-color: grey; padding: 2px 4px; }")
+        self.form_layout.addRow(self.viewport_check)
         self.main_layout.addWidget(self.form_container)
 
         # Web View
         self.browser = QWebEngineView()
         self.main_layout.addWidget(self.browser, stretch=1)
 
+        # Bridge Python <-> JS untuk update peta tanpa reload halaman
+        self.bridge = MapBridge(self)
+        self.bridge.ready.connect(self.on_map_ready)
+        self.bridge.pusatPicked.connect(self.update_pusat)
+        self.bridge.viewportChanged.connect(self.on_viewport_changed)
+        self.browser.loadStarted.connect(self.bridge.reset)
+        attach_bridge(self.browser.page(), self.bridge)
+
+        # Halaman peta & asetnya dilayani dari memori lewat skema gsi://
+        self.scheme = get_scheme_handler(self.browser.page().profile())
+        self.scheme.route_async(TILE_PATH_RE, self.boundary_tile)
+        self.scheme.route_async(MAP_TILE_PATH_RE, tile_resource)
+        self.scheme.route(ASSET_PATH_RE, get_asset_bundle().resource)
+        self.scheme.route_async(OSRM_PATH_RE, osrm_resource, with_query=True)
+
 
     def open_dialog(self):
         # token = self.token_input.strip()
         token = self.settings.value("last_token")
         if token:
-            try:
-                headers = {"Authorization": token}
-                params = {}
-
-                response = requests.get(
-                    f"http://localhost:8000/locations/pusat/",
-                    headers=headers,
-                    params=params,
-                    timeout=5
-                )
-                response.raise_for_status()
-                locs = response.json()
-                m_wkt_point = locs['coordinates']
-                m_latitude, m_longitude = wkbhex_to_latlon(m_wkt_point)
-                lat = round(float(m_latitude), 6)
-                lon = round(float(m_longitude), 6)
-                self.settings.setValue("last_lat", lat)
-                self.settings.setValue("last_lon", lon)
-            except:
-                return
+            api = self.api
+
+            def fetch_center(progress, cancel):
+                progress("Mengambil titik pusat...")
+                return api.center(token)
+
+            self.tasks.submit(
+                "dialog_pusat", fetch_center, self.show_location_dialog,
+                on_progress=self.show_progress,
+                on_failed=lambda e: self.show_progress(None)
+            )
         else:
-            pass
+            self.show_location_dialog()
+
+    def show_location_dialog(self, center=None):
+        self.show_progress(None)
+        if center:
+            m_latitude, m_longitude = center
+            self.settings.setValue("last_lat", round(float(m_latitude), 6))
+            self.settings.setValue("last_lon", round(float(m_longitude), 6))
 
         dialog = LocationInputDialog(parent=self)
 
@@ -369,7 +443,407 @@ class MapWidget(QWidget):
             radius = self.settings.value("last_rad", type=int)
             token = self.settings.value("last_token")
             # token = self.token_input.strip()
-            css_style = """
+            if not token:
+                return
+
+            # Halaman peta cukup dibuat & diload sekali, selanjutnya hanya dikirim diff via bridge
+            if not self._map_requested:
+                self._map_requested = True
+                self.tasks.submit(
+                    "base_map", lambda progress, cancel: self.build_base_map(lat, lon, cancel), self.load_map,
+                    on_failed=self.base_map_failed
+                )
+
+            # Beberapa keyword dipisah koma, dicari bersamaan dan digabung jadi satu hasil
+            job = SearchJob(self.api, self.search_cache, self._result_sets, token,
+                            split_keywords(keyword), lat, lon, radius,
+                            local=self.local_engine, backend=self.search_backend)
+
+            # Refresh baru membatalkan pencarian sebelumnya; hanya hasil terakhir yang digambar
+            started = time.perf_counter()
+            self.tasks.cancel("search_revalidate")
+            self.tasks.submit(
+                "search", job.run, lambda result: self.apply_search(result, radius, started, job),
+                on_progress=self.show_progress,
+                on_partial=lambda batch: self.apply_search_batch(batch, radius, started),
+                on_failed=self.search_failed
+            )
+
+        except ValueError:
+            QMessageBox.warning(self, "Input Error", "Pastikan latitude dan longitude berupa angka")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Terjadi kesalahan: {str(e)}")
+
+    def apply_search_batch(self, data, radius, started):
+        """Satu batch hasil stream: tambahkan ke peta tanpa menunggu batch berikutnya."""
+        update = {}
+        if data["first"] and data["center"]:
+            lat, lon = data["center"]
+            update["center"] = self.center_update(lat, lon, radius)
+            self.start_tile_prefetch(lat, lon, radius)
+        update["results"] = self.results_add(data["batch"])
+        self.push_update(update)
+        if data["first"]:
+            self.api.record("search_first_marker", time.perf_counter() - started)
+
+    def apply_search(self, result, radius, started=None, job=None, background=False):
+        """
+        Dijalankan di UI thread setelah worker selesai: hitung diff lalu kirim ke halaman peta.
+        Hasil revalidate (background) tidak memunculkan dialog, cukup dicatat di log.
+        """
+        self.show_progress(None)
+        update = {}
+        # pusat dari pencarian yang di-stream sudah dikirim bersama batch pertama
+        if "center" in result and not result.get("streamed"):
+            lat, lon = result["center"]
+            update["center"] = self.center_update(lat, lon, radius)
+            self.start_tile_prefetch(lat, lon, radius)
+        if "locations" in result:
+            update["results"] = self.results_update(result["locations"])
+        if "result_sets" in result:
+            self._result_sets = result["result_sets"]
+        self.push_update(update)
+        if started is not None:
+            self.api.record("search_last_marker", time.perf_counter() - started)
+        self.submit_btn.setToolTip(self.search_cache.summary())
+        self.start_drive_times()
+
+        if "revalidate" in result and job is not None:
+            self.revalidate_search(job, result["revalidate"], radius)
+        if background:
+            if result.get("offline"):
+                print("Revalidate pencarian: backend tidak bisa dihubungi, memakai data lokal")
+            elif result["errors"]:
+                print(f"Revalidate pencarian gagal: {'; '.join(result['errors'])}")
+        elif result.get("offline"):
+            QMessageBox.warning(self, "Offline", "Backend tidak bisa dihubungi, hasil pencarian memakai data lokal "
+                                                 f"({self.local_engine.count} lokasi tersimpan)")
+        elif result["errors"]:
+            QMessageBox.warning(self, "API Error", f"Gagal mengambil data: {'; '.join(result['errors'])}")
+
+    def create_search_backend(self):
+        """Backend pencarian: "http" (ApiClient) atau "postgis" (query langsung ke database, untuk instalasi on-prem)."""
+        if self.settings.value("search_backend") == "postgis":
+            try:
+                return get_postgis_backend(self.settings.value("postgis_dsn"), record=self.api.record)
+            except PostgisError as e:
+                print(f"PostGIS tidak bisa dipakai, kembali ke HTTP API: {e}")
+        return self.api
+
+    def sync_local_engine(self):
+        """Perbarui snapshot lokasi lokal dari backend (incremental, berdasarkan updated_at) di background."""
+        if self.local_engine is None:
+            return
+        token = self.settings.value("last_token")
+        api, engine = self.api, self.local_engine
+        self.tasks.submit(
+            "local_sync", lambda progress, cancel: engine.sync(api, token),
+            lambda stored: print(f"Snapshot lokasi lokal: {stored} lokasi diperbarui, total {engine.count}"),
+            on_failed=lambda e: print(f"Gagal sync snapshot lokasi lokal: {e}")
+        )
+
+    def revalidate_search(self, job, keywords, radius):
+        """Perbarui hasil cache yang basi di background, lalu terapkan diff-nya bila berbeda."""
+        self.tasks.submit(
+            "search_revalidate", job.revalidate(keywords),
+            lambda result: self.apply_search(result, radius, background=True),
+            on_failed=lambda e: print(f"Gagal memperbarui cache pencarian: {e}")
+        )
+
+    def base_map_failed(self, error):
+        # peta belum pernah terbentuk: refresh berikutnya harus mencoba membuat halaman peta lagi
+        self._map_requested = False
+        QMessageBox.critical(self, "Error", f"Gagal membuat peta: {str(error)}")
+
+    def search_failed(self, error):
+        self.show_progress(None)
+        QMessageBox.critical(self, "Error", f"Terjadi kesalahan: {str(error)}")
+
+    def show_progress(self, message):
+        self.submit_btn.setText(f"⏳ {message}" if message else SUBMIT_TEXT)
+
+    def update_pusat(self, lat, lon):
+        """Simpan titik pusat baru hasil klik kanan di peta ke backend (di worker)."""
+        token = self.settings.value("last_token")
+        api = self.api
+        self.tasks.submit(
+            "pusat_update", lambda progress, cancel: api.update_pusat(token, lat, lon), lambda _: None,
+            on_failed=lambda e: QMessageBox.warning(self, "API Error", f"Gagal menyimpan titik pusat: {str(e)}")
+        )
+
+    def start_tile_prefetch(self, lat, lon, radius):
+        """Hangatkan cache tile untuk area radius titik pusat di background (sekali per pusat/radius)."""
+        key = (round(lat, 6), round(lon, 6), int(radius))
+        if key == self._prefetch_key:
+            return
+        self._prefetch_key = key
+        if self._prefetch_cancel is not None:
+            self._prefetch_cancel.set()
+        cancel = threading.Event()
+        self._prefetch_cancel = cancel
+
+        min_zoom = self.settings.value("tile_prefetch_min_zoom", type=int)
+        max_zoom = self.settings.value("tile_prefetch_max_zoom", type=int)
+
+        def run():
+            downloaded, cached = get_tile_cache().prefetch(lat, lon, radius, min_zoom, max_zoom, cancel=cancel)
+            print(f"Prefetch tile selesai: {downloaded} didownload, {cached} sudah ada di cache")
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def push_update(self, update):
+        # Sebelum halaman siap, state cukup disimpan; on_map_ready akan mengirim state lengkap
+        if self.bridge.is_ready:
+            self.bridge.push(update)
+
+    def on_map_ready(self):
+        update = {"reset": True}
+        if self._center_state:
+            update["center"] = self._center_state
+        if self._shown_results:
+            update["results"] = {"added": list(self._shown_results.values())}
+        if self._isochrone_state:
+            update["isochrone"] = self._isochrone_state
+        self.bridge.push(update)
+
+    def center_update(self, lat, lon, radius):
+        titik_pusat_content = f"""
+            <div style="font-size: 16px; font-family: Arial;">
+            <b>TITIK PUSAT</b><br><br>
+            Lat: {lat:.6f}<br>Lon: {lon:.6f}
+            <div style="font-size: 14px; font-family: Arial;">
+            <b>Jangkauan radius geodesic:</b> {float(radius)} meter<br>
+            </div></div>
+        """
+        if (lat, lon) != self._drive_origin:
+            self._drive_origin = (lat, lon)
+            self._drive_times = {}
+            self._isochrone_state = None
+        if self._isochrone_state is None:
+            # juga dicoba ulang di refresh berikutnya bila perhitungan sebelumnya gagal
+            self.start_isochrone(lat, lon)
+        self._center_state = {
+            "lat": lat,
+            "lon": lon,
+            "radius": float(radius),
+            "popup_html": titik_pusat_content
+        }
+        return self._center_state
+
+    def result_items(self, locations):
+        items = {}
+        for loc in locations:
+            try:
+                item = self.result_item(loc)
+                if item:
+                    items[item[0]] = item
+            except Exception as loc_error:
+                print(f"Error processing location {loc.get('id')}: {loc_error}")
+                continue
+        return items
+
+    def results_update(self, locations):
+        """Bandingkan hasil pencarian baru dengan yang sedang tampil, kembalikan diff-nya"""
+        items = self.result_items(locations)
+        shown = self._shown_results
+        removed = [key for key in shown if key not in items]
+        added = [item for key, item in items.items() if shown.get(key) != item]
+        self._shown_results = items
+        return {"removed": removed, "added": added}
+
+    def results_add(self, locations):
+        """Tambahkan lokasi ke yang sedang tampil tanpa menghapus yang lain (mode area peta)."""
+        added = []
+        for key, item in self.result_items(locations).items():
+            if self._shown_results.get(key) != item:
+                self._shown_results[key] = item
+                added.append(item)
+        return {"removed": [], "added": added}
+
+    def toggle_viewport_mode(self, checked):
+        self.settings.setValue("viewport_mode", checked)
+        if checked and self._viewport:
+            self.on_viewport_changed(*self._viewport)
+
+    def on_viewport_changed(self, south, west, north, east, zoom):
+        """Muat lokasi untuk tile area pandang yang belum pernah dimuat, tile per tile."""
+        self._viewport = (south, west, north, east, zoom)
+        if not self.settings.value("viewport_mode", type=bool) or zoom < VIEWPORT_MIN_ZOOM:
+            self.cancel_viewport_tiles()
+            self.viewport_check.setText(VIEWPORT_LABEL if zoom >= VIEWPORT_MIN_ZOOM else
+                                        f"{VIEWPORT_LABEL} (perbesar peta ke zoom {VIEWPORT_MIN_ZOOM} atau lebih)")
+            return
+        token = self.settings.value("last_token")
+        keyword = self.settings.value("last_keyword")
+        # jarak & durasi diukur dari titik pusat, jadi tunggu sampai pencarian pertama menentukannya
+        if not token or self._drive_origin is None:
+            return
+
+        # tile urut dari tengah: bila area terlalu luas, pinggirnya tidak dimuat dan pengguna diberi tahu
+        tiles = viewport_tiles(south, west, north, east)
+        if len(tiles) > MAX_VIEWPORT_TILES:
+            self.viewport_check.setText(f"{VIEWPORT_LABEL} (hanya {MAX_VIEWPORT_TILES} dari {len(tiles)} tile "
+                                        "di tengah yang dimuat, perbesar peta)")
+        else:
+            self.viewport_check.setText(VIEWPORT_LABEL)
+
+        cached = []
+        wanted = set()
+        for x, y in tiles[:MAX_VIEWPORT_TILES]:
+            key = ViewportTileCache.key(keyword, VIEWPORT_TILE_ZOOM, x, y)
+            locations = self._viewport_tiles.get(key)
+            if locations is None:
+                wanted.add(key)
+            else:
+                cached.extend(locations)
+
+        # tile yang sudah keluar dari area pandang tidak perlu diselesaikan
+        self.cancel_viewport_tiles(keep=wanted)
+
+        if cached:
+            self.push_update({"results": self.results_add(measure_from(cached, *self._drive_origin))})
+
+        api = self.search_backend
+        for key in wanted - self._viewport_loading:
+            self._viewport_loading.add(key)
+            _, z, x, y = key
+            self.viewport_tasks.submit(
+                f"viewport:{key}",
+                lambda progress, cancel, z=z, x=x, y=y: fetch_tile_locations(api, token, keyword, z, x, y, cancel),
+                lambda locations, key=key: self.viewport_tile_loaded(key, locations),
+                on_failed=lambda e, key=key: self.viewport_tile_failed(key, e)
+            )
+
+    def cancel_viewport_tiles(self, keep=frozenset()):
+        """Batalkan tile yang sedang/akan dimuat kecuali yang ada di keep."""
+        for key in self._viewport_loading - keep:
+            self.viewport_tasks.cancel(f"viewport:{key}")
+        self._viewport_loading &= keep
+
+    def viewport_tile_loaded(self, key, locations):
+        self._viewport_loading.discard(key)
+        self._viewport_tiles.put(key, locations)
+        if locations:
+            self.push_update({"results": self.results_add(measure_from(locations, *self._drive_origin))})
+            self.start_drive_times()
+
+    def start_drive_times(self):
+        """Hitung waktu tempuh riil ke hasil yang belum punya, lewat OSRM /table di background."""
+        if not self.settings.value("drive_time_matrix", type=bool) or self._drive_origin is None:
+            return
+        points = [(row[0], row[1], row[2]) for key, row in self._shown_results.items() if key not in self._drive_times]
+        if not points:
+            return
+        origin = self._drive_origin
+        matrix = get_drive_matrix()
+        apply = lambda times: self.apply_drive_times(origin, times)
+        self.tasks.submit(
+            "drive_times", lambda progress, cancel: matrix.compute(origin[0], origin[1], points, progress, cancel),
+            apply, on_partial=apply,
+            on_failed=lambda e: print(f"Gagal menghitung waktu tempuh OSRM: {e}")
+        )
+
+    def start_isochrone(self, lat, lon):
+        """Hitung isochrone waktu tempuh dari titik pusat di background (hasil dicache per pusat)."""
+        if not self.settings.value("isochrone", type=bool):
+            return
+        minutes = parse_minutes(self.settings.value("isochrone_minutes"))
+        grid_size = max(4, self.settings.value("isochrone_grid", type=int))
+        builder = get_isochrone_builder()
+        self.tasks.submit(
+            "isochrone", lambda progress, cancel: builder.build(lat, lon, minutes, grid_size, cancel),
+            lambda geojson: self.apply_isochrone((lat, lon), geojson),
+            on_failed=lambda e: print(f"Gagal menghitung isochrone: {e}")
+        )
+
+    def apply_isochrone(self, origin, geojson):
+        if origin != self._drive_origin:
+            return
+        self._isochrone_state = geojson
+        self.push_update({"isochrone": geojson})
+
+    def apply_drive_times(self, origin, times):
+        """Ganti durasi/jarak marker dengan hasil OSRM /table (per chunk, begitu datang)."""
+        if origin != self._drive_origin:
+            return
+        self._drive_times.update(times)
+        changed = []
+        for key, (duration, distance) in times.items():
+            row = self._shown_results.get(key)
+            if row is None:
+                continue
+            updated = list(row)
+            updated[DURATION_COLUMN] = round(duration, 2)
+            if distance is not None:
+                updated[DISTANCE_COLUMN] = round(distance, 2)
+                updated[ESTIMATED_COLUMN] = False
+            if updated != row:
+                self._shown_results[key] = updated
+                changed.append(updated)
+        if changed:
+            self.push_update({"results": {"removed": [], "added": changed}})
+
+    def viewport_tile_failed(self, key, error):
+        self._viewport_loading.discard(key)
+        print(f"Gagal memuat lokasi tile {key[1:]}: {error}")
+
+    def result_item(self, loc):
+        """
+        Ringkas satu hasil pencarian menjadi satu baris data (lihat RESULT_FIELDS).
+        Icon dan isi popup dibuat di sisi JS, popup baru dirender ketika dibuka.
+        """
+        loc_lat = loc.get('latitude')
+        loc_lon = loc.get('longitude')
+        if loc_lat is None or loc_lon is None:
+            return None
+
+        name = loc.get('name', 'Unknown')
+        if "Perdagangan" in name:
+            category = "dg"
+        elif "Perikanan" in name:
+            category = "ik"
+        elif "Pertanian" in name:
+            category = "pt"
+        else:
+            return None
+
+        distance = float(loc.get('exact_distance_meter', 'N/A'))
+        duration = float(loc.get('exact_duration_minute'))
+        address = loc.get('alamat', 'Alamat tidak tersedia')
+        details = loc.get('details', {})
+        fasilitas = ', '.join(details.get('fasilitas', []))
+        loc_id = loc.get('id')
+        key = str(loc_id) if loc_id is not None else f"{float(loc_lat):.6f},{float(loc_lon):.6f},{name}"
+        # waktu tempuh riil yang sudah dihitung lewat OSRM /table dipakai ulang saat refresh
+        estimated = bool(loc.get(ESTIMATED_FIELD))
+        drive = self._drive_times.get(key)
+        if drive is not None:
+            duration = drive[0]
+            distance = drive[1] if drive[1] is not None else distance
+            estimated = estimated and drive[1] is None
+        # level dibuat tetap per lokasi supaya marker yang sama tidak dianggap berubah tiap refresh
+        level = self._result_levels.setdefault(key, int(random.choice([1, 2, 3]))) if category == "pt" else 0
+
+        return [
+            key,
+            round(float(loc_lat), 6),
+            round(float(loc_lon), 6),
+            name,
+            category,
+            level,
+            round(distance, 2),
+            round(duration, 2),
+            address,
+            fasilitas,
+            details.get('jam_buka', '?'),
+            details.get('jam_tutup', '?'),
+            loc.get(KEYWORD_FIELD, ''),
+            estimated,
+        ]
+
+    def build_base_map(self, lat, lon, cancel=None):
+        """Bangun halaman peta dasar dengan folium (dijalankan di worker), kembalikan HTML-nya."""
+        css_style = """
                 <style>
                 .custom-tooltip {
                     border-radius: 15px !important;
@@ -414,280 +888,50 @@ class MapWidget(QWidget):
                 }
                 </style>
                 """
-            marker_js_data = []
-            current_zoom = self.m.get_zoom() if hasattr(self, 'm') and hasattr(self.m, 'get_zoom') else 14
-
-            self.m = folium.Map(location=[lat, lon], zoom_start=current_zoom, tiles=None, max_zoom=16)
-
-            folium.TileLayer(
-                tiles='https://server.arcgisonline.com/ArcGIS/rest/services/World_Topo_Map/MapServer/tile/{z}/{y}/{x}',
-                attr='Esri',
-                name='Esri Topo',
-                max_zoom=16
-            ).add_to(self.m)
-
-            folium.TileLayer(
-                tiles='https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}',
-                attr='Esri Satellite',
-                name='Satellite View',
-                overlay=False,
-                control=True,
-                max_zoom=18
-            ).add_to(self.m)
-
-            folium.TileLayer(
-                tiles='openstreetmap',
-                name='Open Street Maps',
-                attr='OpenStreetMap contributors',
-                max_zoom=19
-            ).add_to(self.m)
-
-            if token:
-                try:
-                    headers = {"Authorization": token}
-                    params = {}
-
-                    response = requests.get(
-                        f"http://localhost:8000/locations/pusat/",
-                        headers=headers,
-                        params=params,
-                        timeout=5
-                    )
-                    response.raise_for_status()
-                    locs = response.json()
-                    m_wkt_point = locs['coordinates']
-                    m_latitude, m_longitude = wkbhex_to_latlon(m_wkt_point)
-                    lat = m_latitude
-                    lon = m_longitude
-
-                    self.m.location = [lat, lon]
-
-                    titik_pusat_content = f"""
-                        <div style="font-size: 16px; font-family: Arial;">
-                        <b>TITIK PUSAT</b><br><br>
-                        Lat: {lat:.6f}<br>Lon: {lon:.6f}
-                        <div style="font-size: 14px; font-family: Arial;">
-                        <b>Jangkauan radius geodesic:</b> {float(radius)} meter<br>
-                        </div></div>
-                    """
 
-                    # Titik pusat
-                    self.first_titik_pusat = folium.Marker(
-                        [lat, lon],
-                        popup=folium.Popup(titik_pusat_content, max_width=500),
-                        icon=folium.Icon(color="red", icon="star", prefix="fa")
-                    ).add_to(self.m)
-
-                    self.circle_layer = folium.FeatureGroup(name="Radius Jangkauan", show=False)
-
-                    folium.Circle(
-                        location=[lat, lon],
-                        radius=float(radius),
-                        color='red',
-                        fill=True,
-                        fill_color='red',
-                        fill_opacity=0.2,
-                        popup=f"Radius: {float(radius)} meter"
-                    ).add_to(self.circle_layer)
-                    self.circle_layer.add_to(self.m)
-
-                except requests.exceptions.RequestException as e:
-                    QMessageBox.warning(self, "API Error", f"Gagal mengambil data: {str(e)}")
-            else:
-                return
+        self.m = folium.Map(location=[lat, lon], zoom_start=self.current_zoom, tiles=None, max_zoom=16)
 
-            with open("geo_json/33.72_kecamatan.geojson", "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            gl = folium.GeoJson(
-                data,
-                name="Batas Kecamatan",
-                style_function=lambda feature: {
-                    "fillColor": "red",
-                    "color": "white",
-                    "weight": 2,
-                    "fillOpacity": 0.1,
-                },
-            ).add_to(self.m)
-
-            if token:
-                try:
-                    headers = {"Authorization": token}
-                    params = {
-                        "longitude": lon,
-                        "latitude": lat,
-                        "keyword": keyword,
-                        "radius": radius
-                    }
+        # Tile peta lewat cache lokal (gsi://app/tiles/...), upstream hanya diakses bila belum ada
+        folium.TileLayer(
+            tiles=TILE_URL.format(source='esri_topo'),
+            attr='Esri',
+            name='Esri Topo',
+            max_zoom=16
+        ).add_to(self.m)
 
-                    response = requests.get(
-                        f"http://localhost:8000/locations/nearby/search/?q={keyword}",
-                        headers=headers,
-                        params=params,
-                        timeout=5
-                    )
-                    response.raise_for_status()
-                    locs = response.json()
-                    locations = locs["results"]
-
-                    locations_feature_group = folium.FeatureGroup(
-                        name="📍 Lokasi Terdekat",
-                        show=True  # Tampilkan secara default
-                    ).add_to(self.m)
-
-                    for loc in locations:
-                        try:
-                            loc_lat = loc.get('latitude')
-                            loc_lon = loc.get('longitude')
-                            name = loc.get('name', 'Unknown')
-                            distance = loc.get('exact_distance_meter', 'N/A')
-                            duration = loc.get('exact_duration_minute')
-                            address = loc.get('alamat', 'Alamat tidak tersedia')
-                            fasilitas = ', '.join(loc.get('details', {}).get('fasilitas', []))
-                            level = int(random.choice([1, 2, 3]))
-
-                            if loc_lat is not None and loc_lon is not None:
-                                popup_content = f"""
-                                    <div style="font-size: 16px; font-family: Arial;">
-                                    <b>{name}</b><br><br>
-                                    <div style="font-size: 14px; font-family: Arial;">
-                                    <b>Jangkauan radius geodesic:</b> {float(radius)} meter<br>
-                                    <b>Jarak riil (OSRM):</b> {float(distance):.2f} meter<br>
-                                    <b>Durasi riil (OSRM) :</b> {float(duration):.2f} menit<br>
-                                    <b>Alamat:</b> {address}<br>
-                                    <b>Fasilitas:</b> {fasilitas}<br>
-                                    <b>Jam Operasi:</b> {loc.get('details', {}).get('jam_buka', '?')} - {loc.get('details', {}).get('jam_tutup', '?')}<br>
-                                    <small>Lat: {loc_lat:.6f}, Lon: {loc_lon:.6f}</small>
-                                    </div></div>
-                                """
-
-                                color_map = {
-                                    1: "red",
-                                    2: "blue",
-                                    3: "green",
-                                    4: "yellow"
-                                }
-                                if "Perdagangan" in name:
-                                    circle = f'''
-                                        <div style="
-                                            width:20px;
-                                            height:20px;
-                                            background:{"black"};
-                                            border-radius:50%;
-                                            color:white;
-                                            font-size:12px;
-                                            line-height:20px;
-                                            text-align:center;
-                                            margin-top:0px;">
-                                            {"Dg"}
-                                        </div>
-                                    '''
-
-                                    icon = folium.DivIcon(
-                                        html=f"""
-                                        <div style="display:inline-block; text-align:center;">
-                                            <div style="display:flex; justify-content:center; line-height:0;">
-                                            </div>
-                                            {circle}
-                                        </div>
-                                    """
-                                    )
-                                    folium.Marker(
-                                        [float(loc_lat), float(loc_lon)],
-                                        popup=folium.Popup(popup_content, max_width=500),
-                                        icon=icon,
-                                    ).add_to(locations_feature_group)
-                                elif "Perikanan" in name:
-                                    circle = f'''
-                                        <div style="
-                                            width:20px;
-                                            height:20px;
-                                            background:{"grey"};
-                                            border-radius:50%;
-                                            color:white;
-                                            font-size:12px;
-                                            line-height:20px;
-                                            text-align:center;
-                                            margin-top:0px;">
-                                            {"Ik"}
-                                        </div>
-                                    '''
-
-                                    icon = folium.DivIcon(
-                                        html=f"""
-                                        <div style="display:inline-block; text-align:center;">
-                                            <div style="display:flex; justify-content:center; line-height:0;">
-                                            </div>
-                                            {circle}
-                                        </div>
-                                    """
-                                    )
-                                    folium.Marker(
-                                        [float(loc_lat), float(loc_lon)],
-                                        popup=folium.Popup(popup_content, max_width=500),
-                                        icon=icon,
-                                    ).add_to(locations_feature_group)
-                                elif "Pertanian" in name:
-                                    my_color = color_map[level]
-
-                                    hair_boxes = ""
-                                    for i in range(max(0, level)):
-                                        # default rotasi 0
-                                        angle = 0
-                                        if level == 3:
-                                            if i == 0:
-                                                angle = -20
-                                            elif i == 2:
-                                                angle = 20
-                                        hair_boxes += f'<div style="width:3px;height:8px;background:{my_color};' \
-                                                      f'display:inline-block;margin:0 1px;transform:rotate({angle}deg);"></div>'
-
-                                    # lingkaran utama dengan angka level
-                                    circle = f'''
-                                        <div style="
-                                            width:20px;
-                                            height:20px;
-                                            background:{my_color};
-                                            border-radius:50%;
-                                            color:white;
-                                            font-size:12px;
-                                            line-height:20px;
-                                            text-align:center;
-                                            margin-top:0px;">
-                                            {level}
-                                        </div>
-                                    '''
-
-                                    icon = folium.DivIcon(
-                                        html=f"""
-                                            <div style="display:inline-block; text-align:center;">
-                                                <div style="display:flex; justify-content:center; line-height:0;">
-                                                    {hair_boxes}
-                                                </div>
-                                                {circle}
-                                            </div>
-                                        """
-                                    )
-
-                                    folium.Marker(
-                                        location=[float(loc_lat), float(loc_lon)],
-                                        icon=icon,
-                                        popup=folium.Popup(popup_content, max_width=500),
-                                    ).add_to(locations_feature_group)
-
-                                # Simpan info untuk JS
-                                marker_js_data.append({
-                                    "lat": float(loc_lat),
-                                    "lon": float(loc_lon),
-                                    "name": name
-                                })
-                        except Exception as loc_error:
-                            print(f"Error processing location {loc.get('id')}: {loc_error}")
-                            continue
-                    locations_feature_group.add_to(self.m)
-                    folium.LayerControl().add_to(self.m)
-
-                    right_click_js = """
+        folium.TileLayer(
+            tiles=TILE_URL.format(source='esri_satellite'),
+            attr='Esri Satellite',
+            name='Satellite View',
+            overlay=False,
+            control=True,
+            max_zoom=18
+        ).add_to(self.m)
+
+        folium.TileLayer(
+            tiles=TILE_URL.format(source='osm'),
+            name='Open Street Maps',
+            attr='OpenStreetMap contributors',
+            max_zoom=19
+        ).add_to(self.m)
+
+        self.circle_layer = folium.FeatureGroup(name="Radius Jangkauan", show=False)
+        self.circle_layer.add_to(self.m)
+
+        # Jangkauan riil lewat jalan (isochrone OSRM), diisi lewat bridge setelah titik pusat diketahui
+        self.isochrone_layer = folium.FeatureGroup(name="⏱ Jangkauan Waktu Tempuh", show=False)
+        self.isochrone_layer.add_to(self.m)
+
+        # Batas kecamatan dimuat per tile z/x/y dengan detail sesuai zoom (lihat boundary_tile)
+        BoundaryTileLayer(name="Batas Kecamatan").add_to(self.m)
+
+        self.locations_feature_group = folium.FeatureGroup(
+            name="📍 Lokasi Terdekat",
+            show=True  # Tampilkan secara default
+        ).add_to(self.m)
+        self.layer_control = folium.LayerControl().add_to(self.m)
+
+        right_click_js = """
                     <script>
                         document.addEventListener('DOMContentLoaded', function() {
                             setTimeout(function() {
@@ -709,23 +953,10 @@ class MapWidget(QWidget):
                                             map.removeLayer(pusatMarker);
                                         }
 
-                                        var settings = {
-                                          "url": "http://localhost:8000/location/pusat/update/",
-                                          "method": "PUT",
-                                          "timeout": 0,
-                                          "headers": {
-                                            "Content-Type": "application/json"
-                                          },
-                                          "data": JSON.stringify({
-                                            "name": "TITIK PUSAT",
-                                            "latitude": lat,
-                                            "longitude": lng
-                                          }),
-                                        };
-
-                                        $.ajax(settings).done(function (response) {
-                                          console.log(response);
-                                        });
+                                        // simpan titik pusat baru lewat ApiClient di sisi Python
+                                        if (window.GSI && GSI.bridge) {
+                                            GSI.bridge.pickPusat(lat, lng);
+                                        }
 
                                         // buat marker baru
                                         pusatMarker = L.marker([lat, lng], {
@@ -750,9 +981,9 @@ class MapWidget(QWidget):
                     </script>
                     """
 
-                    click_route_js = f"""
+        click_route_js = """
                     <script>
-                        function createBezierCurve(start, end, curvature = 0.3) {{
+                        function createBezierCurve(start, end, curvature = 0.3) {
                             const midPoint = [
                                 (start[0] + end[0]) / 2,
                                 (start[1] + end[1]) / 2
@@ -769,7 +1000,7 @@ class MapWidget(QWidget):
 
                             // Generate points along the bezier curve
                             const curvePoints = [];
-                            for (let t = 0; t <= 1; t += 0.05) {{
+                            for (let t = 0; t <= 1; t += 0.05) {
                                 const x = Math.pow(1 - t, 2) * start[0] +
                                          2 * (1 - t) * t * controlPoint[0] +
                                          Math.pow(t, 2) * end[0];
@@ -779,226 +1010,285 @@ class MapWidget(QWidget):
                                          Math.pow(t, 2) * end[1];
 
                                 curvePoints.push([x, y]);
-                            }}
+                            }
 
                             return curvePoints;
-                        }}
-
-                        document.addEventListener('DOMContentLoaded', function() {{
-                            setTimeout(function() {{
-                                const mapElement = document.querySelector('.folium-map');
-                                const map = Object.values(window).find(
-                                    (obj) => obj instanceof L.Map && obj.getContainer() === mapElement
-                                );
-                                if (!map) return;
-
-                                const centerLat = {lat};
-                                const centerLon = {lon};
-                                const markersData = {marker_js_data};
-
-                                let activeLayers = []; // simpan semua layer aktif
-
-                                function clearActiveLayers() {{
-                                    activeLayers.forEach(layer => {{
-                                        if (map.hasLayer(layer)) {{
-                                            map.removeLayer(layer);
-                                        }}
-                                    }});
-                                    activeLayers = [];
-                                }}
-
-                                markersData.forEach((m) => {{
-                                    map.eachLayer((layer) => {{
-                                        if (layer instanceof L.Marker) {{
-                                            const pos = layer.getLatLng();
-                                            if (pos.lat.toFixed(6) == m.lat.toFixed(6) && pos.lng.toFixed(6) == m.lon.toFixed(6)) {{
-                                                layer.on('click', async function() {{
-                                                    try {{
-                                                        // Hapus semua layer lama
-                                                        clearActiveLayers();
-
-                                                        const url = `http://localhost:5000/route/v1/driving/${{centerLon}},${{centerLat}};${{m.lon}},${{m.lat}}?overview=full&geometries=geojson`;
-                                                        const res = await fetch(url);
-                                                        const data = await res.json();
-
-                                                        if (data.routes && data.routes.length > 0) {{
-                                                            const coords = data.routes[0].geometry.coordinates.map(c => [c[1], c[0]]);
-                                                            const distance = (data.routes[0].distance / 1000).toFixed(2);
-                                                            const durationInSeconds = data.routes[0].duration;
-                                                            const durationInMinutes = (durationInSeconds / 60).toFixed(1);
-
-                                                            const clickedPoint = [m.lat, m.lon];
-                                                            const endPoint = coords[coords.length - 1];
-                                                            const bezierPoints = createBezierCurve(endPoint, clickedPoint, 0.5);
-
-                                                            const beginPoint = [centerLat, centerLon];   
-                                                            const startPoint = coords[0];                
-                                                            const bezierPointsAwal = createBezierCurve(beginPoint, startPoint, 0.5);
-
-                                                            // Buat polyline rute utama
-                                                            const activeRoute = L.polyline(coords, {{
-                                                                color: 'blue',
-                                                                weight: 6,
-                                                                opacity: 0.5
-                                                            }}).addTo(map);
-                                                            activeLayers.push(activeRoute);
-
-                                                            // Titik awal
-                                                            const activeStartCircle = L.circleMarker(coords[0], {{
-                                                                radius: 6,
-                                                                color: 'blue',
-                                                                fillColor: 'white',
-                                                                fillOpacity: .8
-                                                            }}).addTo(map).bindPopup("Titik Awal");
-                                                            activeLayers.push(activeStartCircle);
-
-                                                            // Garis putus-putus
-                                                            const dashedLinea = L.polyline(bezierPointsAwal, {{
-                                                                color: 'blue',
-                                                                weight: 4,
-                                                                opacity: 0.6,
-                                                                dashArray: '5, 7',
-                                                                lineCap: 'round',
-                                                                lineJoin: 'round',
-                                                                className: 'dashed-connection-line'
-                                                            }}).addTo(map);
-                                                            activeLayers.push(dashedLinea);
-
-                                                            // Titik akhir
-                                                            const activeEndCircle = L.circleMarker(endPoint, {{
-                                                                radius: 6,
-                                                                color: 'blue',
-                                                                fillColor: 'white',
-                                                                fillOpacity: 0.8,
-                                                                weight: 3
-                                                            }}).addTo(map).bindPopup("Titik Akhir");
-                                                            activeLayers.push(activeEndCircle);
-
-                                                            // Garis putus-putus
-                                                            const dashedLine = L.polyline(bezierPoints, {{
-                                                                color: 'blue',
-                                                                weight: 4,
-                                                                opacity: 0.6,
-                                                                dashArray: '5, 7',
-                                                                lineCap: 'round',
-                                                                lineJoin: 'round',
-                                                                className: 'dashed-connection-line'
-                                                            }}).addTo(map);
-                                                            activeLayers.push(dashedLine);
-
-                                                            // Label jarak & waktu
-                                                            const midPoint = Math.floor(coords.length / 2);
-                                                            const midCoord = coords[midPoint];
-
-                                                            const distanceLabel = L.marker(midCoord, {{
-                                                                icon: L.divIcon({{
-                                                                    html: `<div style="
-                                                                        padding: 3px;
-                                                                        background: white;
-                                                                        border: 2px solid blue;
-                                                                        border-radius: 5px;
-                                                                        padding: 2px 5px;
-                                                                        font-weight: normal;
-                                                                        font-size: 10px;
-                                                                    ">
-                                                                    <div style="
-                                                                        display: flex;
-                                                                        align-items: left;
-                                                                        gap: 4px;
-                                                                        padding: 3px 5px;
-                                                                        background: white;
-                                                                        font-weight: bold;
-                                                                        font-size: 12px;
-                                                                        line-height: 1;
-                                                                    ">
-                                                                    <svg xmlns="http://www.w3.org/2000/svg" width="16" height="12"
-                                                                         viewBox="0 0 64 64" fill="#231F20">
-                                                                        <g>
-                                                                            <path d="M43.293,18.696c0.195,0.195,0.451,0.293,0.707,0.293s0.512-0.098,0.707-0.293
-                                                                                c0.391-0.391,0.391-1.023,0-1.414l-2-2c-0.391-0.391-1.023-0.391-1.414,0s-0.391,1.023,0,1.414L43.293,18.696z"/>
-                                                                            <path d="M43.293,23.695c0.195,0.195,0.451,0.293,0.707,0.293s0.512-0.098,0.707-0.293
-                                                                                c0.391-0.391,0.391-1.023,0-1.414l-7-7c-0.391-0.391-1.023-0.391-1.414,0s-0.391,1.023,0,1.414L43.293,23.695z"/>
-                                                                            <g>
-                                                                                <circle cx="11" cy="42.988" r="2"/>
-                                                                                <path d="M58.982,32.076C58.985,32.045,59,32.02,59,31.988c0-2.866-0.589-28-21-28H26c-13.346,0-21,10.206-21,28
-                                                                                    c0,0.031,0.015,0.057,0.018,0.088C2.176,32.547,0,35.016,0,37.988v10c0,3.309,2.691,6,6,6v5c0,0.553,0.447,1,1,1h8
-                                                                                    c0.553,0,1-0.447,1-1v-5h32v5c0,0.553,0.447,1,1,1h8c0.553,0,1-0.447,1-1v-5c3.309,0,6-2.691,6-6v-10
-                                                                                    C64,35.016,61.824,32.547,58.982,32.076z M14,57.988H8v-4h6V57.988z M11,46.988c-2.206,0-4-1.794-4-4s1.794-4,4-4
-                                                                                    s4,1.794,4,4S13.206,46.988,11,46.988z M43,45.988H21c-0.553,0-1-0.447-1-1s0.447-1,1-1h22c0.553,0,1,0.447,1,1
-                                                                                    S43.553,45.988,43,45.988z M18,31.988c0-3.313,2.687-6,6-6s6,2.687,6,6H18z M43,41.988H21c-0.553,0-1-0.447-1-1
-                                                                                    s0.447-1,1-1h22c0.553,0,1,0.447,1,1S43.553,41.988,43,41.988z M32,31.988c0-4.418-3.582-8-8-8s-8,3.582-8,8h-5
-                                                                                    c0-18.184,8.701-22,16-22h10c6.34,0,10.909,3.16,13.581,9.394C52.825,24.62,53,30.355,53,31.988H32z M56,57.988h-6v-4h6V57.988z
-                                                                                     M53,46.988c-2.206,0-4-1.794-4-4s1.794-4,4-4s4,1.794,4,4S55.206,46.988,53,46.988z"/>
-                                                                                <circle cx="53" cy="42.988" r="2"/>
-                                                                            </g>
-                                                                        </g>
-                                                                    </svg>
-                                                                    <span style="white-space: nowrap;">${{durationInMinutes}} min</span>
-                                                                    </div>
-                                                                    <div></div>
-                                                                    <span style="margin-left: 5px; white-space: nowrap:">${{distance}} km</span>`,
-                                                                    className: '',
-                                                                    iconSize: [80, 40]
-                                                                }}),
-                                                                zIndexOffset: 1000,
-                                                                interactive: false
-                                                            }}).addTo(map);
-                                                            activeLayers.push(distanceLabel);
-
-                                                            map.fitBounds(activeRoute.getBounds());
-                                                        }}
-                                                    }} catch (err) {{
-                                                        console.error("Gagal ambil rute:", err);
-                                                    }}
-                                                }});
-                                            }}
-                                        }}
-                                    }});
-                                }});
-                            }}, 200);
-                        }});
+                        }
+
+                        window.GSI = window.GSI || {};
+
+                        let activeLayers = []; // simpan semua layer aktif
+
+                        // Rute tampil dulu dengan overview=simplified, detail penuh diambil saat di-zoom
+                        let routeDetail = null;
+                        let routeDetailHooked = false;
+
+                        function routeUrl(centerLon, centerLat, m, overview) {
+                            return `/osrm/route/v1/driving/${centerLon},${centerLat};${m.lon},${m.lat}` +
+                                `?overview=${overview}&geometries=polyline6`;
+                        }
+
+                        // Cache rute sisi halaman per (titik pusat, id marker), diisi juga saat marker di-hover
+                        const ROUTE_CACHE_SIZE = 100;
+                        const MAX_PREFETCH = 2;
+                        const routeCache = new Map();   // key -> Promise data OSRM (overview=simplified)
+                        const prefetching = [];          // prefetch yang sedang berjalan, paling lama di depan
+
+                        function routeKey(m) {
+                            return `${GSI.center.lat},${GSI.center.lon}|${m.key}`;
+                        }
+
+                        function fetchRoute(m, controller) {
+                            const key = routeKey(m);
+                            let promise = routeCache.get(key);
+                            if (promise) {
+                                // pindahkan ke urutan paling baru (LRU)
+                                routeCache.delete(key);
+                                routeCache.set(key, promise);
+                                return promise;
+                            }
+                            const url = routeUrl(GSI.center.lon, GSI.center.lat, m, 'simplified');
+                            promise = fetch(url, controller ? {signal: controller.signal} : {}).then(res => res.json());
+                            // request yang gagal / dibatalkan tidak disimpan
+                            promise.catch(() => {
+                                if (routeCache.get(key) === promise) routeCache.delete(key);
+                            });
+                            routeCache.set(key, promise);
+                            while (routeCache.size > ROUTE_CACHE_SIZE) {
+                                routeCache.delete(routeCache.keys().next().value);
+                            }
+                            return promise;
+                        }
+
+                        // Dipanggil layer hasil saat marker di-hover / popup dibuka
+                        GSI.prefetchRoute = function(m) {
+                            if (!GSI.center || routeCache.has(routeKey(m))) {
+                                return;
+                            }
+                            if (prefetching.length >= MAX_PREFETCH) {
+                                // hover terbaru diutamakan, prefetch paling lama dibatalkan
+                                prefetching.shift().controller.abort();
+                            }
+                            const entry = {key: routeKey(m), controller: new AbortController()};
+                            prefetching.push(entry);
+                            fetchRoute(m, entry.controller).catch(() => {}).finally(() => {
+                                const i = prefetching.indexOf(entry);
+                                if (i >= 0) prefetching.splice(i, 1);
+                            });
+                        };
+
+                        async function loadRouteDetail() {
+                            const detail = routeDetail;
+                            if (!detail || detail.requested || GSI.map.getZoom() < GSI.routeDetailZoom) {
+                                return;
+                            }
+                            detail.requested = true;
+                            try {
+                                const res = await fetch(detail.url);
+                                const data = await res.json();
+                                // rute sudah diganti / dihapus selama menunggu
+                                if (detail !== routeDetail || !data.routes || data.routes.length === 0) {
+                                    return;
+                                }
+                                detail.layer.setLatLngs(GSI.decodePolyline(data.routes[0].geometry, 6));
+                            } catch (err) {
+                                console.error("Gagal ambil detail rute:", err);
+                            }
+                        }
+
+                        GSI.clearRoute = function() {
+                            activeLayers.forEach(layer => {
+                                if (GSI.map.hasLayer(layer)) {
+                                    GSI.map.removeLayer(layer);
+                                }
+                            });
+                            activeLayers = [];
+                            routeDetail = null;
+                        };
+
+                        // Dipanggil layer hasil pencarian saat marker diklik (lookup lewat id marker)
+                        GSI.routeTo = async function(m) {
+                            const map = GSI.map;
+
+                            try {
+                                // Hapus semua layer lama
+                                GSI.clearRoute();
+
+                                const centerLat = GSI.center.lat;
+                                const centerLon = GSI.center.lon;
+
+                                // prefetch hover untuk marker ini dipakai dan tidak boleh dibatalkan lagi
+                                const claimed = prefetching.findIndex(p => p.key === routeKey(m));
+                                if (claimed >= 0) prefetching.splice(claimed, 1);
+                                const data = await fetchRoute(m);
+
+                                if (data.routes && data.routes.length > 0) {
+                                    const coords = GSI.decodePolyline(data.routes[0].geometry, 6);
+                                    const distance = (data.routes[0].distance / 1000).toFixed(2);
+                                    const durationInSeconds = data.routes[0].duration;
+                                    const durationInMinutes = (durationInSeconds / 60).toFixed(1);
+
+                                    const clickedPoint = [m.lat, m.lon];
+                                    const endPoint = coords[coords.length - 1];
+                                    const bezierPoints = createBezierCurve(endPoint, clickedPoint, 0.5);
+
+                                    const beginPoint = [centerLat, centerLon];   
+                                    const startPoint = coords[0];                
+                                    const bezierPointsAwal = createBezierCurve(beginPoint, startPoint, 0.5);
+
+                                    // Buat polyline rute utama
+                                    const activeRoute = L.polyline(coords, {
+                                        color: 'blue',
+                                        weight: 6,
+                                        opacity: 0.5
+                                    }).addTo(map);
+                                    activeLayers.push(activeRoute);
+
+                                    // Titik awal
+                                    const activeStartCircle = L.circleMarker(coords[0], {
+                                        radius: 6,
+                                        color: 'blue',
+                                        fillColor: 'white',
+                                        fillOpacity: .8
+                                    }).addTo(map).bindPopup("Titik Awal");
+                                    activeLayers.push(activeStartCircle);
+
+                                    // Garis putus-putus
+                                    const dashedLinea = L.polyline(bezierPointsAwal, {
+                                        color: 'blue',
+                                        weight: 4,
+                                        opacity: 0.6,
+                                        dashArray: '5, 7',
+                                        lineCap: 'round',
+                                        lineJoin: 'round',
+                                        className: 'dashed-connection-line'
+                                    }).addTo(map);
+                                    activeLayers.push(dashedLinea);
+
+                                    // Titik akhir
+                                    const activeEndCircle = L.circleMarker(endPoint, {
+                                        radius: 6,
+                                        color: 'blue',
+                                        fillColor: 'white',
+                                        fillOpacity: 0.8,
+                                        weight: 3
+                                    }).addTo(map).bindPopup("Titik Akhir");
+                                    activeLayers.push(activeEndCircle);
+
+                                    // Garis putus-putus
+                                    const dashedLine = L.polyline(bezierPoints, {
+                                        color: 'blue',
+                                        weight: 4,
+                                        opacity: 0.6,
+                                        dashArray: '5, 7',
+                                        lineCap: 'round',
+                                        lineJoin: 'round',
+                                        className: 'dashed-connection-line'
+                                    }).addTo(map);
+                                    activeLayers.push(dashedLine);
+
+                                    // Label jarak & waktu
+                                    const midPoint = Math.floor(coords.length / 2);
+                                    const midCoord = coords[midPoint];
+
+                                    const distanceLabel = L.marker(midCoord, {
+                                        icon: L.divIcon({
+                                            html: `<div style="
+                                                padding: 3px;
+                                                background: white;
+                                                border: 2px solid blue;
+                                                border-radius: 5px;
+                                                padding: 2px 5px;
+                                                font-weight: normal;
+                                                font-size: 10px;
+                                            ">
+                                            <div style="
+                                                display: flex;
+                                                align-items: left;
+                                                gap: 4px;
+                                                padding: 3px 5px;
+                                                background: white;
+                                                font-weight: bold;
+                                                font-size: 12px;
+                                                line-height: 1;
+                                            ">
+                                            <svg xmlns="http://www.w3.org/2000/svg" width="16" height="12"
+                                                 viewBox="0 0 64 64" fill="#231F20">
+                                                <g>
+                                                    <path d="M43.293,18.696c0.195,0.195,0.451,0.293,0.707,0.293s0.512-0.098,0.707-0.293
+                                                        c0.391-0.391,0.391-1.023,0-1.414l-2-2c-0.391-0.391-1.023-0.391-1.414,0s-0.391,1.023,0,1.414L43.293,18.696z"/>
+                                                    <path d="M43.293,23.695c0.195,0.195,0.451,0.293,0.707,0.293s0.512-0.098,0.707-0.293
+                                                        c0.391-0.391,0.391-1.023,0-1.414l-7-7c-0.391-0.391-1.023-0.391-1.414,0s-0.391,1.023,0,1.414L43.293,23.695z"/>
+                                                    <g>
+                                                        <circle cx="11" cy="42.988" r="2"/>
+                                                        <path d="M58.982,32.076C58.985,32.045,59,32.02,59,31.988c0-2.866-0.589-28-21-28H26c-13.346,0-21,10.206-21,28
+                                                            c0,0.031,0.015,0.057,0.018,0.088C2.176,32.547,0,35.016,0,37.988v10c0,3.309,2.691,6,6,6v5c0,0.553,0.447,1,1,1h8
+                                                            c0.553,0,1-0.447,1-1v-5h32v5c0,0.553,0.447,1,1,1h8c0.553,0,1-0.447,1-1v-5c3.309,0,6-2.691,6-6v-10
+                                                            C64,35.016,61.824,32.547,58.982,32.076z M14,57.988H8v-4h6V57.988z M11,46.988c-2.206,0-4-1.794-4-4s1.794-4,4-4
+                                                            s4,1.794,4,4S13.206,46.988,11,46.988z M43,45.988H21c-0.553,0-1-0.447-1-1s0.447-1,1-1h22c0.553,0,1,0.447,1,1
+                                                            S43.553,45.988,43,45.988z M18,31.988c0-3.313,2.687-6,6-6s6,2.687,6,6H18z M43,41.988H21c-0.553,0-1-0.447-1-1
+                                                            s0.447-1,1-1h22c0.553,0,1,0.447,1,1S43.553,41.988,43,41.988z M32,31.988c0-4.418-3.582-8-8-8s-8,3.582-8,8h-5
+                                                            c0-18.184,8.701-22,16-22h10c6.34,0,10.909,3.16,13.581,9.394C52.825,24.62,53,30.355,53,31.988H32z M56,57.988h-6v-4h6V57.988z
+                                                             M53,46.988c-2.206,0-4-1.794-4-4s1.794-4,4-4s4,1.794,4,4S55.206,46.988,53,46.988z"/>
+                                                        <circle cx="53" cy="42.988" r="2"/>
+                                                    </g>
+                                                </g>
+                                            </svg>
+                                            <span style="white-space: nowrap;">${durationInMinutes} min</span>
+                                            </div>
+                                            <div></div>
+                                            <span style="margin-left: 5px; white-space: nowrap:">${distance} km</span>`,
+                                            className: '',
+                                            iconSize: [80, 40]
+                                        }),
+                                        zIndexOffset: 1000,
+                                        interactive: false
+                                    }).addTo(map);
+                                    activeLayers.push(distanceLabel);
+
+                                    routeDetail = {url: routeUrl(centerLon, centerLat, m, 'full'), layer: activeRoute};
+                                    if (!routeDetailHooked) {
+                                        routeDetailHooked = true;
+                                        map.on('zoomend', loadRouteDetail);
+                                    }
+                                    map.fitBounds(activeRoute.getBounds());
+                                    loadRouteDetail();
+                                }
+                            } catch (err) {
+                                console.error("Gagal ambil rute:", err);
+                            }
+                        };
                     </script>
                     """
 
-                    self.m.get_root().html.add_child(folium.Element(css_style))
-                    self.m.get_root().html.add_child(folium.Element(right_click_js))
-                    self.m.get_root().html.add_child(folium.Element(click_route_js))
-                    self.add_legend()
-
-                except requests.exceptions.RequestException as e:
-                    QMessageBox.warning(self, "API Error", f"Gagal mengambil data: {str(e)}")
-
-            # Simpan ke file HTML
-            if not os.path.exists('temp'):
-                os.makedirs('temp')
-            map_path = os.path.join('temp', 'map.html')
-            self.m.save(map_path)
-
-            # Load peta di browser widget
-            self.browser.setUrl(QUrl(f"http://localhost:{self.server_port}/temp/map.html"))
-
-        except ValueError:
-            QMessageBox.warning(self, "Input Error", "Pastikan latitude dan longitude berupa angka")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Terjadi kesalahan: {str(e)}")
-
-    def add_kecamatan(self):
-        with open("geo_json/33.72_kecamatan.geojson", "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        folium.GeoJson(
-            data,
-            name="Batas Kecamatan",
-            style_function=lambda feature: {
-
-                "fillColor": "yellow",
-                "color": "red",
-                "weight": 2,
-                "fillOpacity": 0.2,
-            },
-            tooltip=folium.GeoJsonTooltip(fields=["nm_kecamatan"], aliases=["Kecamatan:"])
-        ).add_to(self.m)
-        folium.LayerControl().add_to(self.m)
+        self.m.get_root().html.add_child(folium.Element(css_style))
+        self.m.get_root().html.add_child(folium.Element(right_click_js))
+        self.m.get_root().html.add_child(folium.Element(
+            f"<script>{DECODE_POLYLINE_JS}GSI.routeDetailZoom = {ROUTE_DETAIL_ZOOM};</script>"
+        ))
+        self.m.get_root().html.add_child(folium.Element(click_route_js))
+        self.add_legend()
+        ResultLayerScript(self.locations_feature_group, self.layer_control).add_to(self.m)
+        BridgeScript(self.circle_layer, self.isochrone_layer).add_to(self.m)
+
+        # render folium adalah tahap paling berat; lewati bila task sudah dibatalkan
+        if cancel is not None:
+            cancel.check()
+        # Aset CDN diganti dengan salinan di folder vendor bila sudah di-vendor
+        return get_asset_bundle().rewrite(self.m.get_root().render())
+
+    def load_map(self, html):
+        # Halaman disimpan di memori dan dilayani lewat gsi://app (tanpa file temp / HTTPServer)
+        url = self.scheme.put(self.map_path, html, "text/html")
+
+        # Load peta di browser widget
+        self.browser.setUrl(QUrl(url))
+
+    @staticmethod
+    def boundary_tile(z, x, y):
+        # isi tile tidak berubah selama proses berjalan, boleh dicache browser
+        body = get_boundary_pyramid().tile(int(z), int(x), int(y))
+        return body.encode("utf-8"), "application/geo+json", LONG_CACHE
 
     def add_legend(self):
         """Menambahkan legenda ke peta"""
@@ -1073,8 +1363,11 @@ class CircularImageLabel(QLabel):
     def _create_circular_pixmap(self, image_url: str, diameter: int) -> QPixmap:
         # 1) Load and scale the original pixmap (preserve aspect ratio, crop if needed)
 
-        response = requests.get(image_url)
-        img_data = response.content
+        try:
+            img_data = get_api_client().image(image_url)
+        except requests.exceptions.RequestException as e:
+            print(f"Gagal mengambil foto profil: {e}")
+            img_data = b""
 
         # Convert ke QPixmap
         pixmap = QPixmap()
@@ -1225,15 +1518,6 @@ class MainWindow(QMainWindow):
             self.pages.addWidget(window)
             self.pages_dict["Tentukan Titik Pusat"] = window
 
-            # Cleanup
-            def cleanup():
-                try:
-                    import shutil
-                    if os.path.exists('temp'):
-                        shutil.rmtree('temp')
-                except:
-                    pass
-
         # add_page("Tentukan Titik Pusat")
         add_titik_pusat()
         add_page("Buat Geo location")
@@ -1503,34 +1787,20 @@ class LoginPage(QWidget):
             self.status_label.setText("⚠️ Username and password required")
             return
 
-        url = "http://0.0.0.0:8000/token"
-        payload = {
-            "grant_type": "password",
-            "username": username,
-            "password": password,
-            "scope": "",
-            "client_id": "janus-client",
-            "client_secret": "supersecret123",
-        }
-        headers = {"Accept": "application/json"}
+        settings = QSettings("Kho Ming Suun", "Geo Spatial")
+        api = get_api_client(settings.value("api_base_url", DEFAULT_BASE_URL))
 
         try:
-            response = requests.post(url, headers=headers, data=payload, timeout=5)
-            response.raise_for_status()
-            token_data = response.json()
+            token_data = api.login(username, password)
             access_token = token_data.get("access_token")
             if access_token:
                 # --- ambil data user ---
-                url_me = "http://0.0.0.0:8000/me"
-                headers = {'Authorization': f"Bearer {access_token}"}
-                response = requests.get(url_me, headers=headers)
-                str_json = response.json()
+                str_json = api.me(access_token)
 
                 img_url = str_json.get("image_profile", "")
                 usr_name = str_json.get("username", "")
 
                 # --- simpan ke QSettings ---
-                settings = QSettings("Kho Ming Suun", "Geo Spatial")
                 settings.setValue("last_token", f"Bearer {access_token}")
                 settings.setValue("last_image_profile", img_url)
                 settings.setValue("last_username", usr_name)
@@ -1546,6 +1816,7 @@ class LoginPage(QWidget):
 
 
 if __name__ == "__main__":
+    register_scheme()
     app = QApplication(sys.argv)
     login = LoginPage()
     login.show()
@@ -0,0 +1,185 @@
+import json
+
+from folium.elements import MacroElement
+from folium.template import Template
+from PySide6.QtCore import QObject, Signal, Slot, QFile, QIODevice
+from PySide6.QtWebChannel import QWebChannel
+from PySide6.QtWebEngineCore import QWebEngineScript
+
+class MapBridge(QObject):
+    """
+    Jembatan Python <-> JS (QWebChannel) untuk halaman peta yang hanya diload sekali.
+    Update (titik pusat, radius, hasil pencarian) dikirim sebagai JSON diff.
+    """
+    updatePushed = Signal(str)
+    ready = Signal()
+    pusatPicked = Signal(float, float)
+    viewportChanged = Signal(float, float, float, float, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.is_ready = False
+
+    @Slot()
+    def pageReady(self):
+        # dipanggil dari JS setiap kali halaman selesai terhubung ke channel
+        self.is_ready = True
+        self.ready.emit()
+
+    @Slot(float, float)
+    def pickPusat(self, lat, lon):
+        # klik kanan di peta: titik pusat baru disimpan lewat ApiClient di sisi Python
+        self.pusatPicked.emit(lat, lon)
+
+    @Slot(float, float, float, float, int)
+    def reportViewport(self, south, west, north, east, zoom):
+        # dipanggil JS setiap kali peta selesai digeser / di-zoom
+        self.viewportChanged.emit(south, west, north, east, zoom)
+
+    def reset(self):
+        self.is_ready = False
+
+    def push(self, update: dict):
+        if not update:
+            return
+        self.updatePushed.emit(json.dumps(update, separators=(",", ":")))
+
+
+def attach_bridge(page, bridge: MapBridge):
+    """
+    Daftarkan bridge ke QWebEnginePage dan sisipkan qwebchannel.js ke setiap dokumen.
+    """
+    channel = QWebChannel(page)
+    channel.registerObject("bridge", bridge)
+    page.setWebChannel(channel)
+
+    f = QFile(":/qtwebchannel/qwebchannel.js")
+    if f.open(QIODevice.ReadOnly):
+        source = bytes(f.readAll()).decode("utf-8")
+        f.close()
+
+        script = QWebEngineScript()
+        script.setName("qwebchannel")
+        script.setSourceCode(source)
+        script.setInjectionPoint(QWebEngineScript.DocumentCreation)
+        script.setWorldId(QWebEngineScript.MainWorld)
+        script.setRunsOnSubFrames(False)
+        page.scripts().insert(script)
+    return channel
+
+
+class BridgeScript(MacroElement):
+    """
+    Script sisi JS yang menerima update dari MapBridge dan menerapkannya ke layer peta.
+    Harus ditambahkan ke peta setelah layer radius, layer isochrone dan ResultLayerScript.
+    """
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+        (function() {
+            const map = {{ this._parent.get_name() }};
+            const circleLayer = {{ this.circle_layer.get_name() }};
+            const isochroneLayer = {{ this.isochrone_layer.get_name() if this.isochrone_layer else 'null' }};
+
+            window.GSI = window.GSI || {};
+            GSI.map = map;
+            GSI.center = null;
+
+            let pusatMarker = null;
+            let radiusCircle = null;
+
+            function applyCenter(c) {
+                const moved = !GSI.center || GSI.center.lat !== c.lat || GSI.center.lon !== c.lon;
+                GSI.center = c;
+
+                if (pusatMarker) {
+                    map.removeLayer(pusatMarker);
+                }
+                pusatMarker = L.marker([c.lat, c.lon], {
+                    icon: L.AwesomeMarkers.icon({icon: 'star', prefix: 'fa', markerColor: 'red'})
+                }).bindPopup(c.popup_html, {maxWidth: 500}).addTo(map);
+
+                if (radiusCircle) {
+                    circleLayer.removeLayer(radiusCircle);
+                }
+                radiusCircle = L.circle([c.lat, c.lon], {
+                    radius: c.radius,
+                    color: 'red',
+                    fill: true,
+                    fillColor: 'red',
+                    fillOpacity: 0.2
+                }).bindPopup(`Radius: ${c.radius.toFixed(1)} meter`).addTo(circleLayer);
+
+                if (moved) {
+                    map.panTo([c.lat, c.lon]);
+                }
+            }
+
+            // Isochrone waktu tempuh: ambang terbesar digambar dulu supaya yang kecil di atasnya
+            const ISOCHRONE_COLORS = ['#1a9850', '#fee08b', '#fc8d59', '#d73027'];
+            function applyIsochrone(geojson) {
+                if (!isochroneLayer) return;
+                isochroneLayer.clearLayers();
+                if (!geojson) return;
+                const features = geojson.features.slice().sort((a, b) => b.properties.minutes - a.properties.minutes);
+                const minutes = features.map((f) => f.properties.minutes).reverse();
+                L.geoJSON({type: 'FeatureCollection', features: features}, {
+                    interactive: true,
+                    style: (f) => {
+                        const color = ISOCHRONE_COLORS[Math.min(minutes.indexOf(f.properties.minutes), ISOCHRONE_COLORS.length - 1)];
+                        return {color: color, weight: 1, fillColor: color, fillOpacity: 0.25};
+                    },
+                    onEachFeature: (f, layer) => layer.bindTooltip(`≤ ${f.properties.minutes} menit berkendara`, {sticky: true})
+                }).addTo(isochroneLayer);
+            }
+
+            function applyUpdate(update) {
+                if (update.reset) {
+                    GSI.results.reset();
+                }
+                // rute lama dihapus saat pencarian baru; tambahan lokasi dari mode area peta tidak menghapusnya
+                if ((update.reset || update.center) && GSI.clearRoute) {
+                    GSI.clearRoute();
+                }
+                if (update.center) {
+                    applyCenter(update.center);
+                }
+                if (update.results) {
+                    GSI.results.apply(update.results);
+                }
+                if ('isochrone' in update) {
+                    applyIsochrone(update.isochrone);
+                }
+            }
+
+            // Area pandang dilaporkan ke Python (debounce) untuk mode muat lokasi per area peta
+            let viewportTimer = null;
+            function reportViewport() {
+                if (!GSI.bridge) return;
+                const b = map.getBounds();
+                GSI.bridge.reportViewport(b.getSouth(), b.getWest(), b.getNorth(), b.getEast(), map.getZoom());
+            }
+            map.on('moveend', function() {
+                clearTimeout(viewportTimer);
+                viewportTimer = setTimeout(reportViewport, 250);
+            });
+
+            new QWebChannel(qt.webChannelTransport, function(channel) {
+                const bridge = channel.objects.bridge;
+                GSI.bridge = bridge;
+                bridge.updatePushed.connect(function(payload) {
+                    applyUpdate(JSON.parse(payload));
+                });
+                bridge.pageReady();
+                reportViewport();
+            });
+        })();
+        {% endmacro %}
+        """
+    )
+
+    def __init__(self, circle_layer, isochrone_layer=None):
+        super().__init__()
+        self._name = "BridgeScript"
+        self.circle_layer = circle_layer
+        self.isochrone_layer = isochrone_layer
@@ -0,0 +1,172 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode
+
+import requests
+
+DEFAULT_OSRM_URL = "http://localhost:5000"
+DEFAULT_CACHE_PATH = os.path.join("cache", "osrm.sqlite")
+
+# Koordinat dibulatkan ke 5 desimal (~1,1 m): klik ulang marker yang sama memakai rute yang sama
+COORD_PRECISION = 5
+# Jaringan jalan jarang berubah; rute di disk dibuang setelah seminggu
+MAX_AGE = 7 * 24 * 3600
+
+# gsi://app/osrm/route/v1/driving/lon,lat;lon,lat?overview=full&geometries=geojson
+OSRM_PATH_RE = re.compile(r"^/osrm/(route|table)/v1/(\w+)/([\d.,;\-]+)$")
+
+
+def round_coords(coords: str) -> str:
+    """'110.7864391,-7.5579241;...' -> '110.78644,-7.55792;...' (koordinat OSRM lon,lat dipisah ';')."""
+    points = []
+    for point in coords.split(";"):
+        lon, lat = point.split(",")
+        points.append(f"{round(float(lon), COORD_PRECISION)},{round(float(lat), COORD_PRECISION)}")
+    return ";".join(points)
+
+
+class OsrmProxy:
+    """
+    Proxy OSRM (route/table) untuk halaman peta: hasil dicache di LRU memori dan opsional di SQLite,
+    request identik yang bersamaan hanya diteruskan sekali ke osrm-routed, dan koneksi ke osrm-routed
+    dipakai ulang (keep-alive) lewat satu Session. Lock hanya menjaga LRU memori & request yang
+    sedang berjalan; baca SQLite di luar lock, tulis lewat satu thread penulis.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_OSRM_URL, path: str = DEFAULT_CACHE_PATH,
+                 max_entries: int = 512, timeout=(3, 30)):
+        self.base_url = base_url.rstrip("/")
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.stats = {"hit": 0, "miss": 0, "shared": 0}
+        self._memory = OrderedDict()    # key -> body (bytes)
+        self._inflight = {}             # key -> Future, untuk request yang sedang berjalan
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="osrm-cache")
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=8)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            db = self._db()
+            db.execute("CREATE TABLE IF NOT EXISTS osrm (key TEXT PRIMARY KEY, body BLOB NOT NULL, stored_at REAL NOT NULL)")
+            db.execute("DELETE FROM osrm WHERE stored_at < ?", (time.time() - MAX_AGE,))
+            db.commit()
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def key(service: str, profile: str, coords: str, query: str = "") -> str:
+        params = urlencode(sorted(parse_qsl(query or "")))
+        return f"{service}/v1/{profile}/{round_coords(coords)}?{params}"
+
+    def fetch(self, service: str, profile: str, coords: str, query: str = "") -> bytes:
+        """Body JSON respons OSRM untuk service (route/table), dari cache bila ada."""
+        key = self.key(service, profile, coords, query)
+        with self._lock:
+            body = self._memory.get(key)
+            if body is not None:
+                self._memory.move_to_end(key)
+                self.stats["hit"] += 1
+                return body
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.stats["shared"] += 1
+
+        if not owner:
+            # request yang sama sedang berjalan (atau dibaca dari disk) di worker lain, tunggu hasilnya saja
+            return future.result()
+
+        try:
+            row = None
+            if self.path:
+                row = self._db().execute("SELECT body FROM osrm WHERE key=?", (key,)).fetchone()
+            if row is not None:
+                body = row[0]
+                with self._lock:
+                    self._remember(key, body)
+                    self.stats["hit"] += 1
+            else:
+                with self._lock:
+                    self.stats["miss"] += 1
+                body = self._request(key)
+            future.set_result(body)
+            return body
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _request(self, key: str) -> bytes:
+        response = self.session.get(f"{self.base_url}/{key}", timeout=self.timeout)
+        body = response.content
+        # NoRoute dsb (400) tetap diteruskan ke halaman, tapi hanya respons "Ok" yang dicache
+        if response.ok:
+            with self._lock:
+                self._remember(key, body)
+            if self.path:
+                self._writer.submit(self._write, key, body)
+        return body
+
+    def _write(self, key, body):
+        try:
+            db = self._db()
+            db.execute("INSERT OR REPLACE INTO osrm VALUES (?, ?, ?)", (key, body, time.time()))
+            db.commit()
+        except sqlite3.Error as e:
+            print(f"Gagal menyimpan rute OSRM ke disk: {e}")
+
+    def _remember(self, key, body):
+        self._memory[key] = body
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def summary(self) -> str:
+        total = self.stats["hit"] + self.stats["miss"] + self.stats["shared"]
+        rate = (self.stats["hit"] + self.stats["shared"]) / total if total else 0.0
+        return (f"Cache OSRM: hit rate {rate:.0%} "
+                f"(hit {self.stats['hit']}, digabung {self.stats['shared']}, miss {self.stats['miss']})")
+
+
+_proxy = None
+_proxy_lock = threading.Lock()
+
+
+def get_osrm_proxy(base_url: str = DEFAULT_OSRM_URL, path: str = DEFAULT_CACHE_PATH) -> OsrmProxy:
+    global _proxy
+    with _proxy_lock:
+        if _proxy is None:
+            _proxy = OsrmProxy(base_url, path)
+    return _proxy
+
+
+def osrm_resource(service, profile, coords, query):
+    """Resource untuk GsiSchemeHandler (dijalankan di worker thread)."""
+    try:
+        body = get_osrm_proxy().fetch(service, profile, coords, query)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Gagal mengambil {service} OSRM: {e}")
+        return None
+    return body, "application/json", "no-store"
@@ -0,0 +1,178 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+from api_client import STREAM_BATCH_SIZE, wkb_to_latlon_arrays
+from local_engine import ESTIMATED_FIELD, ESTIMATED_SPEED_M_PER_MIN
+from search_job import MAX_PARALLEL_KEYWORDS
+
+try:
+    import psycopg2
+    import psycopg2.extensions
+    import psycopg2.pool
+except ImportError:     # mode PostGIS opsional, mode HTTP tidak butuh psycopg2
+    psycopg2 = None
+
+DEFAULT_DSN = "dbname=gsi user=postgres host=localhost"
+DEFAULT_TABLE = "locations"
+DEFAULT_GEOM_COLUMN = "coordinates"
+
+PREPARED_NAME = "gsi_nearby_search"
+
+# Satu koneksi per keyword yang dicari bersamaan + task lain (viewport) di TaskRunner
+DEFAULT_POOL_SIZE = MAX_PARALLEL_KEYWORDS + 4
+# Lama menunggu koneksi bebas bila semua sedang dipakai
+POOL_TIMEOUT = 10
+
+
+if psycopg2 is not None:
+    class _PooledConnection(psycopg2.extensions.connection):
+        """Koneksi yang mencatat sendiri apakah query pencarian sudah di-PREPARE di sesinya."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.gsi_prepared = False
+
+
+class PostgisError(requests.exceptions.RequestException):
+    """
+    Error koneksi / query PostGIS. Turunan RequestException supaya ditangani sama seperti
+    error backend HTTP (fallback ke snapshot lokal, pesan "API Error").
+    """
+
+
+class PostgisBackend:
+    """
+    Pencarian lokasi terdekat langsung ke tabel PostGIS, tanpa lewat HTTP API.
+    Interface sama dengan ApiClient.nearby_search / nearby_search_stream sehingga bisa dipakai
+    SearchJob dan viewport loader; token diterima tapi tidak dipakai (akses diatur oleh DSN).
+    Koneksi diambil dari ThreadedConnectionPool berukuran tetap (minconn == maxconn, jadi koneksi
+    tidak ditutup setelah dipakai), query disiapkan sekali per koneksi (PREPARE), dan geometri
+    dikirim sebagai WKB biner lalu di-decode sekaligus dengan shapely.
+    """
+
+    def __init__(self, dsn: str = DEFAULT_DSN, pool_size: int = DEFAULT_POOL_SIZE,
+                 table: str = DEFAULT_TABLE, geom_column: str = DEFAULT_GEOM_COLUMN, record=None):
+        if psycopg2 is None:
+            raise PostgisError("psycopg2 belum terpasang (pip install psycopg2-binary)")
+        try:
+            self.pool = psycopg2.pool.ThreadedConnectionPool(pool_size, pool_size, dsn,
+                                                             connection_factory=_PooledConnection)
+        except psycopg2.Error as e:
+            raise PostgisError(str(e)) from e
+        # pool psycopg2 raise PoolError bila habis; di sini pemanggil menunggu koneksi bebas
+        self._available = threading.BoundedSemaphore(pool_size)
+        # record(endpoint, elapsed, ok) -- biasanya ApiClient.record, supaya latency masuk ringkasan yang sama
+        self.record = record
+        self._statement = f"""
+            PREPARE {PREPARED_NAME} (float8, float8, float8, text) AS
+            SELECT id, name, alamat, details,
+                   ST_AsBinary({geom_column}) AS wkb,
+                   ST_Distance({geom_column}::geography, ST_SetSRID(ST_MakePoint($1, $2), 4326)::geography) AS distance
+            FROM {table}
+            WHERE ST_DWithin({geom_column}::geography, ST_SetSRID(ST_MakePoint($1, $2), 4326)::geography, $3)
+              AND (name ILIKE $4 ESCAPE '\\' OR alamat ILIKE $4 ESCAPE '\\')
+            ORDER BY distance
+        """
+
+    @contextmanager
+    def _cursor(self):
+        if not self._available.acquire(timeout=POOL_TIMEOUT):
+            raise PostgisError(f"Tidak ada koneksi PostGIS bebas setelah {POOL_TIMEOUT} detik")
+        conn = None
+        broken = False
+        try:
+            conn = self.pool.getconn()
+            if not conn.gsi_prepared:
+                # hanya SELECT: autocommit supaya koneksi di pool tidak "idle in transaction"
+                conn.autocommit = True
+            with conn.cursor() as cur:
+                if not conn.gsi_prepared:
+                    cur.execute(self._statement)
+                    conn.gsi_prepared = True
+                yield cur
+        except psycopg2.Error as e:
+            # termasuk PoolError (pool ditutup / habis) supaya tetap jatuh ke fallback snapshot lokal
+            broken = conn is not None and (bool(conn.closed) or isinstance(e, psycopg2.OperationalError))
+            raise PostgisError(str(e)) from e
+        finally:
+            # koneksi rusak ditutup; pool membuka koneksi baru (belum di-PREPARE) saat dibutuhkan
+            if conn is not None:
+                self.pool.putconn(conn, close=broken)
+            self._available.release()
+
+    def _execute(self, cur, lat, lon, keyword, radius):
+        # % dan _ dari input pengguna dicari apa adanya, bukan sebagai wildcard ILIKE
+        escaped = (keyword or "").strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        cur.execute(f"EXECUTE {PREPARED_NAME} (%s, %s, %s, %s)", (lon, lat, float(radius), pattern))
+
+    @staticmethod
+    def _rows_to_locations(rows):
+        if not rows:
+            return []
+        lats, lons, valid = wkb_to_latlon_arrays([r[4] for r in rows])
+        locations = []
+        for row, lat, lon, ok in zip(rows, lats, lons, valid):
+            if not ok:
+                continue
+            distance = float(row[5])
+            locations.append({
+                "id": row[0],
+                "name": row[1],
+                "alamat": row[2],
+                "details": row[3] or {},
+                "latitude": float(lat),
+                "longitude": float(lon),
+                "exact_distance_meter": distance,
+                "exact_duration_minute": distance / ESTIMATED_SPEED_M_PER_MIN,
+                ESTIMATED_FIELD: True,
+            })
+        return locations
+
+    def nearby_search(self, token, lat: float, lon: float, keyword: str, radius: int) -> dict:
+        start = time.perf_counter()
+        ok = False
+        try:
+            with self._cursor() as cur:
+                self._execute(cur, lat, lon, keyword, radius)
+                results = self._rows_to_locations(cur.fetchall())
+            ok = True
+            return {"results": results}
+        finally:
+            if self.record:
+                self.record("postgis_search", time.perf_counter() - start, ok)
+
+    def nearby_search_stream(self, token, lat: float, lon: float, keyword: str, radius: int,
+                             batch_size: int = STREAM_BATCH_SIZE):
+        start = time.perf_counter()
+        ok = False
+        try:
+            with self._cursor() as cur:
+                self._execute(cur, lat, lon, keyword, radius)
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield self._rows_to_locations(rows)
+            ok = True
+        finally:
+            if self.record:
+                self.record("postgis_search", time.perf_counter() - start, ok)
+
+    def close(self):
+        self.pool.closeall()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_postgis_backend(dsn: str = DEFAULT_DSN, record=None) -> PostgisBackend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = PostgisBackend(dsn, record=record)
+    return _backend
@@ -0,0 +1,386 @@
+from folium.elements import MacroElement
+from folium.template import Template
+
+# Urutan kolom satu baris hasil pencarian yang dikirim ke halaman peta
+RESULT_FIELDS = (
+    "key", "lat", "lon", "name", "category", "level", "distance", "duration",
+    "address", "fasilitas", "jam_buka", "jam_tutup", "keyword", "estimated",
+)
+
+
+class ResultLayerScript(MacroElement):
+    """
+    Layer hasil pencarian sisi JS (GSI.results): titik dikelompokkan per grid pixel sesuai zoom,
+    cluster bisa diklik untuk memperbesar. Titik tunggal digambar di canvas bila jumlahnya banyak,
+    dan memakai DivIcon kategori (Perdagangan/Perikanan/Pertanian) bila sedikit.
+    Titik tunggal dikelompokkan per keyword pencarian, tiap keyword jadi overlay di layer control.
+    Daftar list_size hasil terdekat menurut waktu tempuh ditampilkan di pojok kiri bawah.
+    """
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+        (function() {
+            const map = {{ this._parent.get_name() }};
+            const resultLayer = {{ this.result_layer.get_name() }};
+            const layerControl = {{ this.layer_control.get_name() if this.layer_control else 'null' }};
+
+            const CELL_SIZE = {{ this.cell_size }};   // ukuran grid cluster (px)
+            const DOM_LIMIT = {{ this.dom_limit }};   // batas titik tunggal yang digambar sebagai DivIcon
+            const LIST_SIZE = {{ this.list_size }};   // jumlah baris daftar hasil terdekat (0 = tanpa daftar)
+
+            window.GSI = window.GSI || {};
+
+            // Baris hasil pencarian dikirim ringkas sebagai array, urutan kolom = RESULT_FIELDS
+            const FIELDS = {{ this.fields|tojson }};
+            function toItem(row) {
+                const item = {};
+                FIELDS.forEach((field, i) => item[field] = row[i]);
+                return item;
+            }
+
+            const LEVEL_COLORS = {1: 'red', 2: 'blue', 3: 'green', 4: 'yellow'};
+            const iconCache = {};
+
+            function itemColor(item) {
+                if (item.category === 'dg') return 'black';
+                if (item.category === 'ik') return 'grey';
+                return LEVEL_COLORS[item.level];
+            }
+
+            function circleHtml(background, label) {
+                return `<div style="width:20px;height:20px;background:${background};border-radius:50%;` +
+                    `color:white;font-size:12px;line-height:20px;text-align:center;margin-top:0px;">${label}</div>`;
+            }
+
+            function iconHtml(category, level) {
+                let hairBoxes = '';
+                let circle = '';
+                if (category === 'dg') {
+                    circle = circleHtml('black', 'Dg');
+                } else if (category === 'ik') {
+                    circle = circleHtml('grey', 'Ik');
+                } else {
+                    const color = LEVEL_COLORS[level];
+                    for (let i = 0; i < Math.max(0, level); i++) {
+                        // default rotasi 0
+                        let angle = 0;
+                        if (level === 3) {
+                            if (i === 0) angle = -20;
+                            else if (i === 2) angle = 20;
+                        }
+                        hairBoxes += `<div style="width:3px;height:8px;background:${color};` +
+                            `display:inline-block;margin:0 1px;transform:rotate(${angle}deg);"></div>`;
+                    }
+                    circle = circleHtml(color, level);
+                }
+                return `<div style="display:inline-block; text-align:center;">` +
+                    `<div style="display:flex; justify-content:center; line-height:0;">${hairBoxes}</div>` +
+                    `${circle}</div>`;
+            }
+
+            // Satu objek icon dipakai bersama oleh semua marker dengan kategori & level yang sama
+            function resultIcon(category, level) {
+                const key = category + level;
+                if (!iconCache[key]) {
+                    iconCache[key] = L.divIcon({html: iconHtml(category, level), className: 'empty'});
+                }
+                return iconCache[key];
+            }
+
+            function popupHtml(item) {
+                const radius = GSI.center ? GSI.center.radius.toFixed(1) : '?';
+                return `<div style="font-size: 16px; font-family: Arial;">
+                    <b>${item.name}</b><br><br>
+                    <div style="font-size: 14px; font-family: Arial;">
+                    <b>Jangkauan radius geodesic:</b> ${radius} meter<br>
+                    ${item.estimated
+                        ? `<b>Jarak garis lurus (perkiraan):</b> ${item.distance.toFixed(2)} meter<br>
+                    <b>Durasi (perkiraan) :</b> ${item.duration.toFixed(2)} menit<br>`
+                        : `<b>Jarak riil (OSRM):</b> ${item.distance.toFixed(2)} meter<br>
+                    <b>Durasi riil (OSRM) :</b> ${item.duration.toFixed(2)} menit<br>`}
+                    <b>Keyword:</b> ${item.keyword}<br>
+                    <b>Alamat:</b> ${item.address}<br>
+                    <b>Fasilitas:</b> ${item.fasilitas}<br>
+                    <b>Jam Operasi:</b> ${item.jam_buka} - ${item.jam_tutup}<br>
+                    <small>Lat: ${item.lat.toFixed(6)}, Lon: ${item.lon.toFixed(6)}</small>
+                    </div></div>`;
+            }
+
+            const canvasRenderer = L.canvas({padding: 0.5});
+            const items = {};           // key -> item
+            const domMarkers = {};      // key -> L.Marker (DivIcon), dibuat sekali lalu dipakai ulang
+            const canvasMarkers = {};   // key -> L.CircleMarker di canvas
+            let shown = new Set();      // layer titik tunggal yang sedang tampil
+            let clusterLayers = [];
+            const keywordGroups = {};   // keyword -> L.FeatureGroup di dalam resultLayer
+
+            function keywordGroup(keyword) {
+                let group = keywordGroups[keyword];
+                if (!group) {
+                    group = L.featureGroup();
+                    resultLayer.addLayer(group);
+                    keywordGroups[keyword] = group;
+                    if (layerControl) {
+                        layerControl.addOverlay(group, `🔎 ${keyword || 'Lokasi'}`);
+                    }
+                }
+                return group;
+            }
+
+            function keywordVisible(keyword) {
+                const group = keywordGroups[keyword];
+                return !group || map.hasLayer(group);
+            }
+
+            function dropGroup(keyword) {
+                const group = keywordGroups[keyword];
+                if (layerControl) {
+                    layerControl.removeLayer(group);
+                }
+                resultLayer.removeLayer(group);
+                delete keywordGroups[keyword];
+            }
+
+            // keyword yang tidak lagi punya hasil dihapus dari layer control
+            function pruneGroups() {
+                const used = new Set(Object.values(items).map((item) => item.keyword));
+                Object.keys(keywordGroups).forEach((keyword) => {
+                    if (!used.has(keyword)) dropGroup(keyword);
+                });
+            }
+
+            function singleLayer(item, useDom) {
+                const cache = useDom ? domMarkers : canvasMarkers;
+                if (!cache[item.key]) {
+                    // gsiKey = id stabil lokasi, dipakai handler klik untuk lookup item
+                    cache[item.key] = useDom
+                        ? L.marker([item.lat, item.lon], {icon: resultIcon(item.category, item.level), gsiKey: item.key})
+                        : L.circleMarker([item.lat, item.lon], {
+                            gsiKey: item.key,
+                            renderer: canvasRenderer,
+                            radius: 7,
+                            color: 'white',
+                            weight: 1,
+                            fillColor: itemColor(item),
+                            fillOpacity: 0.9
+                        });
+                    // popup dibuat saat dibuka saja (lazy)
+                    cache[item.key].bindPopup(() => popupHtml(item), {maxWidth: 500});
+                    cache[item.key]._gsiGroup = keywordGroup(item.keyword);
+                }
+                return cache[item.key];
+            }
+
+            function clusterLayer(cell) {
+                let lat = 0, lon = 0;
+                const colors = {};
+                cell.forEach((item) => {
+                    lat += item.lat;
+                    lon += item.lon;
+                    const color = itemColor(item);
+                    colors[color] = (colors[color] || 0) + 1;
+                });
+                // warna cluster mengikuti kategori terbanyak di dalamnya
+                const color = Object.keys(colors).reduce((a, b) => colors[a] >= colors[b] ? a : b);
+                const n = cell.length;
+                const size = n < 10 ? 28 : n < 100 ? 34 : n < 1000 ? 40 : 48;
+                const bounds = L.latLngBounds(cell.map((item) => [item.lat, item.lon]));
+
+                const marker = L.marker([lat / n, lon / n], {
+                    icon: L.divIcon({
+                        html: `<div style="width:${size}px;height:${size}px;line-height:${size - 6}px;` +
+                            `border-radius:50%;background:white;border:3px solid ${color};color:black;` +
+                            `font:bold 12px Arial;text-align:center;opacity:0.9;">${n}</div>`,
+                        className: 'empty',
+                        iconSize: [size, size]
+                    })
+                });
+                marker.on('click', () => map.fitBounds(bounds.pad(0.2), {maxZoom: map.getMaxZoom()}));
+                return marker;
+            }
+
+            function render() {
+                if (!map.hasLayer(resultLayer)) {
+                    return;
+                }
+                const zoom = map.getZoom();
+                const pixelBounds = map.getPixelBounds();
+                const margin = pixelBounds.getSize().divideBy(4);
+                const min = pixelBounds.min.subtract(margin);
+                const max = pixelBounds.max.add(margin);
+                // di zoom maksimum semua titik ditampilkan tanpa cluster
+                const clustering = zoom < map.getMaxZoom();
+
+                const cells = new Map();
+                for (const key in items) {
+                    const item = items[key];
+                    if (item._zoom !== zoom) {
+                        item._point = map.project([item.lat, item.lon], zoom);
+                        item._zoom = zoom;
+                    }
+                    const p = item._point;
+                    if (!keywordVisible(item.keyword)) {
+                        continue;
+                    }
+                    if (p.x < min.x || p.y < min.y || p.x > max.x || p.y > max.y) {
+                        continue;
+                    }
+                    const cellKey = clustering
+                        ? Math.floor(p.x / CELL_SIZE) + ':' + Math.floor(p.y / CELL_SIZE)
+                        : key;
+                    let cell = cells.get(cellKey);
+                    if (!cell) {
+                        cell = [];
+                        cells.set(cellKey, cell);
+                    }
+                    cell.push(item);
+                }
+
+                const singles = [];
+                const clusters = [];
+                cells.forEach((cell) => (cell.length === 1 ? singles.push(cell[0]) : clusters.push(cell)));
+                const useDom = singles.length <= DOM_LIMIT;
+
+                const next = new Set(singles.map((item) => singleLayer(item, useDom)));
+                shown.forEach((layer) => {
+                    if (!next.has(layer)) layer._gsiGroup.removeLayer(layer);
+                });
+                next.forEach((layer) => {
+                    if (!shown.has(layer)) layer._gsiGroup.addLayer(layer);
+                });
+                shown = next;
+
+                clusterLayers.forEach((layer) => resultLayer.removeLayer(layer));
+                clusterLayers = clusters.map(clusterLayer);
+                clusterLayers.forEach((layer) => resultLayer.addLayer(layer));
+            }
+
+            // Daftar hasil terdekat menurut durasi (waktu tempuh riil OSRM begitu tersedia)
+            let listBox = null;
+            let listed = [];
+            if (LIST_SIZE > 0) {
+                const listControl = L.control({position: 'bottomleft'});
+                listControl.onAdd = function() {
+                    listBox = L.DomUtil.create('div', 'gsi-result-list');
+                    listBox.style.cssText = 'background:white;padding:6px 8px;border-radius:5px;' +
+                        'box-shadow:0 1px 5px rgba(0,0,0,0.4);font:12px Arial;max-width:280px;display:none;';
+                    L.DomEvent.disableClickPropagation(listBox);
+                    L.DomEvent.disableScrollPropagation(listBox);
+                    listBox.addEventListener('click', (e) => {
+                        const row = e.target.closest('[data-index]');
+                        const item = row && listed[row.dataset.index];
+                        if (item && GSI.routeTo) {
+                            GSI.routeTo(item);
+                        }
+                    });
+                    return listBox;
+                };
+                listControl.addTo(map);
+            }
+
+            // LIST_SIZE item dengan durasi terkecil, tanpa mengurutkan seluruh hasil
+            function nearest() {
+                const top = [];
+                for (const key in items) {
+                    const item = items[key];
+                    if (!keywordVisible(item.keyword)) continue;
+                    if (top.length === LIST_SIZE) {
+                        if (item.duration >= top[LIST_SIZE - 1].duration) continue;
+                        top[LIST_SIZE - 1] = item;
+                    } else {
+                        top.push(item);
+                    }
+                    for (let i = top.length - 1; i > 0 && top[i - 1].duration > top[i].duration; i--) {
+                        [top[i - 1], top[i]] = [top[i], top[i - 1]];
+                    }
+                }
+                return top;
+            }
+
+            function renderList() {
+                if (!listBox) return;
+                listed = nearest();
+                listBox.style.display = listed.length ? '' : 'none';
+                listBox.innerHTML = '<b>Terdekat (waktu tempuh)</b>' + listed.map((item, i) =>
+                    `<div data-index="${i}" style="cursor:pointer;padding:2px 0;white-space:nowrap;` +
+                    `overflow:hidden;text-overflow:ellipsis;">${i + 1}. ${item.name} — ` +
+                    `<b>${item.estimated ? '± ' : ''}${item.duration.toFixed(1)} menit</b>, ${(item.distance / 1000).toFixed(2)} km</div>`
+                ).join('');
+            }
+
+            let renderPending = false;
+            function scheduleRender() {
+                if (renderPending) return;
+                renderPending = true;
+                L.Util.requestAnimFrame(() => {
+                    renderPending = false;
+                    render();
+                    renderList();
+                });
+            }
+
+            function forget(key) {
+                [domMarkers, canvasMarkers].forEach((cache) => {
+                    const layer = cache[key];
+                    if (layer) {
+                        layer._gsiGroup.removeLayer(layer);
+                        shown.delete(layer);
+                        delete cache[key];
+                    }
+                });
+                delete items[key];
+            }
+
+            // Satu handler klik untuk semua marker: cari item lewat id, tanpa scan layer peta
+            resultLayer.on('click', (e) => {
+                const item = items[e.layer.options.gsiKey];
+                if (item && GSI.routeTo) {
+                    GSI.routeTo(item);
+                }
+            });
+
+            // Rute mulai diambil saat marker di-hover atau popup dibuka, jadi klik langsung tampil
+            resultLayer.on('mouseover popupopen', (e) => {
+                const item = e.layer && items[e.layer.options.gsiKey];
+                if (item && GSI.prefetchRoute) {
+                    GSI.prefetchRoute(item);
+                }
+            });
+
+            map.on('moveend', scheduleRender);
+            // resultLayer atau overlay keyword dinyalakan/dimatikan lewat layer control
+            map.on('overlayadd overlayremove', scheduleRender);
+
+            GSI.results = {
+                reset: function() {
+                    Object.keys(items).forEach(forget);
+                    Object.keys(keywordGroups).forEach(dropGroup);
+                    resultLayer.clearLayers();
+                    shown = new Set();
+                    clusterLayers = [];
+                },
+                apply: function(r) {
+                    (r.removed || []).forEach(forget);
+                    (r.added || []).map(toItem).forEach((item) => {
+                        forget(item.key);
+                        items[item.key] = item;
+                    });
+                    pruneGroups();
+                    scheduleRender();
+                }
+            };
+        })();
+        {% endmacro %}
+        """
+    )
+
+    def __init__(self, result_layer, layer_control=None, cell_size: int = 60, dom_limit: int = 300,
+                 list_size: int = 10):
+        super().__init__()
+        self._name = "ResultLayerScript"
+        self.fields = RESULT_FIELDS
+        self.result_layer = result_layer
+        self.layer_control = layer_control
+        self.cell_size = cell_size
+        self.dom_limit = dom_limit
+        self.list_size = list_size
@@ -0,0 +1,76 @@
+# Geometri rute OSRM diminta sebagai encoded polyline presisi 6 desimal ("polyline6"):
+# jauh lebih ringkas dari GeoJSON dan langsung di-decode ke [lat, lon] tanpa map ulang koordinat
+POLYLINE_PRECISION = 6
+
+# Rute ditampilkan dulu dengan overview=simplified; detail penuh baru diambil mulai zoom ini
+ROUTE_DETAIL_ZOOM = 14
+
+# Decoder JS untuk halaman peta: GSI.decodePolyline(str, precision) -> [[lat, lon], ...]
+DECODE_POLYLINE_JS = """
+window.GSI = window.GSI || {};
+GSI.decodePolyline = function(encoded, precision) {
+    const factor = Math.pow(10, precision || 6);
+    const coords = [];
+    let index = 0, lat = 0, lon = 0;
+    while (index < encoded.length) {
+        for (let axis = 0; axis < 2; axis++) {
+            let shift = 0, result = 0, byte;
+            do {
+                byte = encoded.charCodeAt(index++) - 63;
+                result |= (byte & 0x1f) << shift;
+                shift += 5;
+            } while (byte >= 0x20);
+            const delta = (result & 1) ? ~(result >> 1) : (result >> 1);
+            if (axis === 0) lat += delta; else lon += delta;
+        }
+        coords.push([lat / factor, lon / factor]);
+    }
+    return coords;
+};
+"""
+
+
+def _encode_value(value: int) -> str:
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def encode_polyline(coords, precision: int = POLYLINE_PRECISION) -> str:
+    """[(lat, lon), ...] -> encoded polyline."""
+    factor = 10 ** precision
+    encoded = []
+    prev_lat = prev_lon = 0
+    for lat, lon in coords:
+        lat_i, lon_i = round(lat * factor), round(lon * factor)
+        encoded.append(_encode_value(lat_i - prev_lat))
+        encoded.append(_encode_value(lon_i - prev_lon))
+        prev_lat, prev_lon = lat_i, lon_i
+    return "".join(encoded)
+
+
+def decode_polyline(encoded: str, precision: int = POLYLINE_PRECISION):
+    """Encoded polyline -> [(lat, lon), ...] (pasangan dari GSI.decodePolyline)."""
+    factor = 10 ** precision
+    coords = []
+    index = lat = lon = 0
+    while index < len(encoded):
+        values = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            values.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += values[0]
+        lon += values[1]
+        coords.append((lat / factor, lon / factor))
+    return coords
@@ -0,0 +1,181 @@
+import mimetypes
+import os
+import re
+
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtWebEngineCore import QWebEngineUrlScheme, QWebEngineUrlSchemeHandler, QWebEngineUrlRequestJob
+
+SCHEME_NAME = b"gsi"
+BASE_URL = "gsi://app"
+
+NO_STORE = "no-store"
+SHORT_CACHE = "public, max-age=3600"
+LONG_CACHE = "public, max-age=86400"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+STATIC_PATH_RE = re.compile(r"^/static/([\w\-. ()]+)$")
+
+
+def register_scheme():
+    """
+    Daftarkan skema gsi:// ke QtWebEngine. Wajib dipanggil sebelum QApplication dibuat.
+    """
+    scheme = QWebEngineUrlScheme(SCHEME_NAME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(
+        QWebEngineUrlScheme.Flag.SecureScheme
+        | QWebEngineUrlScheme.Flag.LocalAccessAllowed
+        | QWebEngineUrlScheme.Flag.CorsEnabled
+        | QWebEngineUrlScheme.Flag.FetchApiAllowed
+    )
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+def static_file(name: str):
+    """Resource untuk file di folder static/ (ikon dsb), boleh dicache browser."""
+    path = os.path.join("static", name)
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as f:
+        body = f.read()
+    mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return body, mime, SHORT_CACHE
+
+
+class _RouteSignals(QObject):
+    finished = Signal(int, object)
+
+
+class _RouteTask(QRunnable):
+    """Menjalankan handler route async (mis. download tile) di luar UI thread."""
+
+    def __init__(self, job_id, handler, args, signals):
+        super().__init__()
+        self.job_id = job_id
+        self.handler = handler
+        self.args = args
+        self.signals = signals
+
+    def run(self):
+        try:
+            resource = self.handler(*self.args)
+        except Exception as e:
+            print(f"Gagal melayani request async: {e}")
+            resource = None
+        self.signals.finished.emit(self.job_id, resource)
+
+
+class GsiSchemeHandler(QWebEngineUrlSchemeHandler):
+    """
+    Melayani halaman peta dan asetnya langsung dari memori lewat gsi://app/...,
+    menggantikan file temp + HTTPServer per widget.
+    Resource berupa tuple (body, mime, cache_control).
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._resources = {}
+        self._routes = {}
+        self._async_routes = {}
+        self._jobs = {}
+        self._next_job_id = 0
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(6)
+        self._signals = _RouteSignals(self)
+        self._signals.finished.connect(self._finish_job)
+        self.route(STATIC_PATH_RE, static_file)
+
+    def put(self, path: str, body, mime: str, cache_control: str = NO_STORE) -> str:
+        """Simpan resource statis di memori, kembalikan URL lengkapnya."""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self._resources[path] = (body, mime, cache_control)
+        return BASE_URL + path
+
+    def remove(self, path: str):
+        self._resources.pop(path, None)
+
+    def route(self, pattern, handler):
+        """Daftarkan handler dinamis; handler(*groups) mengembalikan resource atau None."""
+        self._routes[pattern] = handler
+
+    def route_async(self, pattern, handler, with_query: bool = False):
+        """
+        Seperti route(), tapi handler dijalankan di thread pool (untuk I/O jaringan/disk).
+        Dengan with_query=True, query string URL ikut dikirim sebagai argumen terakhir handler.
+        """
+        self._async_routes[pattern] = (handler, with_query)
+
+    def resolve(self, path: str):
+        resource = self._resources.get(path)
+        if resource is not None:
+            return resource
+        for pattern, handler in self._routes.items():
+            match = pattern.match(path)
+            if match:
+                return handler(*match.groups())
+        return None
+
+    def requestStarted(self, job: QWebEngineUrlRequestJob):
+        path = job.requestUrl().path()
+        for pattern, (handler, with_query) in self._async_routes.items():
+            match = pattern.match(path)
+            if match:
+                args = match.groups() + ((job.requestUrl().query(),) if with_query else ())
+                self._start_async(job, handler, args)
+                return
+
+        try:
+            resource = self.resolve(path)
+        except Exception as e:
+            print(f"Gagal melayani {path}: {e}")
+            job.fail(QWebEngineUrlRequestJob.Error.RequestFailed)
+            return
+
+        if resource is None:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+        self.reply(job, resource)
+
+    def _start_async(self, job, handler, args):
+        job_id = self._next_job_id
+        self._next_job_id += 1
+        self._jobs[job_id] = job
+        # job bisa dihapus WebEngine (mis. request dibatalkan) sebelum worker selesai
+        job.destroyed.connect(lambda *_: self._jobs.pop(job_id, None))
+        self._pool.start(_RouteTask(job_id, handler, args, self._signals))
+
+    def _finish_job(self, job_id, resource):
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        if resource is None:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+        else:
+            self.reply(job, resource)
+
+    @staticmethod
+    def reply(job: QWebEngineUrlRequestJob, resource):
+        body, mime, cache_control = resource
+        job.setAdditionalResponseHeaders({
+            QByteArray(b"Cache-Control"): QByteArray(cache_control.encode("ascii")),
+            QByteArray(b"Access-Control-Allow-Origin"): QByteArray(b"*"),
+        })
+        # buffer dimiliki job, ikut dihapus saat request selesai
+        buffer = QBuffer(job)
+        buffer.setData(QByteArray(body))
+        buffer.open(QIODevice.ReadOnly)
+        job.reply(mime.encode("ascii"), buffer)
+
+
+_handlers = {}
+
+
+def get_scheme_handler(profile) -> GsiSchemeHandler:
+    """Satu handler per QWebEngineProfile (skema hanya boleh dipasang sekali per profile)."""
+    handler = _handlers.get(id(profile))
+    if handler is None:
+        handler = GsiSchemeHandler(profile)
+        profile.installUrlSchemeHandler(SCHEME_NAME, handler)
+        _handlers[id(profile)] = handler
+    return handler
@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CACHE_PATH = os.path.join("cache", "search.sqlite")
+
+# Titik pusat dibulatkan ke grid ~110 m dan radius ke kelipatan 100 m,
+# jadi pencarian ulang di sekitar pusat yang hampir sama memakai hasil yang sama
+GRID_DEGREES = 0.001
+RADIUS_BUCKET = 100
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+def search_key(keyword: str, lat: float, lon: float, radius: float) -> str:
+    keyword = (keyword or "").strip().lower()
+    return "|".join((
+        keyword,
+        str(round(lat / GRID_DEGREES)),
+        str(round(lon / GRID_DEGREES)),
+        str(int(round(radius / RADIUS_BUCKET))),
+    ))
+
+
+class SearchCache:
+    """
+    Cache hasil /locations/nearby/search/: LRU di memori, opsional disimpan ke SQLite.
+    Entri lebih muda dari ttl dianggap segar; sampai max_age masih boleh dipakai sebagai
+    hasil basi (stale-while-revalidate) sambil pencarian ulang berjalan di background.
+    Lock hanya menjaga LRU memori; baca SQLite dilakukan di luar lock dan tulis di thread
+    penulis tersendiri, jadi keyword lain tidak menunggu json.dumps + commit hasil besar.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = 256,
+                 ttl: float = 300, max_age: float = 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_age = max_age
+        self.stats = {FRESH: 0, STALE: 0, MISS: 0}
+        self._memory = OrderedDict()    # key -> (hasil, waktu disimpan)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-cache")
+
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            db = self._db()
+            db.execute("CREATE TABLE IF NOT EXISTS search (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)")
+            db.execute("DELETE FROM search WHERE stored_at < ?", (time.time() - max_age,))
+            db.commit()
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            self._local.db = db
+        return db
+
+    def get(self, keyword: str, lat: float, lon: float, radius: float, count: bool = True):
+        """
+        Kembalikan (hasil, status) dengan status FRESH, STALE atau MISS.
+        count=False untuk lookup ulang (revalidate) supaya satu pencarian tidak dihitung dua kali di stats.
+        """
+        key = search_key(keyword, lat, lon, radius)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is None and self.path:
+            row = self._db().execute("SELECT value, stored_at FROM search WHERE key=?", (key,)).fetchone()
+            if row is not None:
+                entry = (json.loads(row[0]), row[1])
+                with self._lock:
+                    # put() yang lebih baru selama kita membaca disk tidak ditimpa
+                    if key not in self._memory:
+                        self._remember(key, entry)
+
+        age = time.time() - entry[1] if entry is not None else None
+        if age is None or age > self.max_age:
+            state, value = MISS, None
+        else:
+            state, value = (FRESH if age <= self.ttl else STALE), entry[0]
+        if count:
+            with self._lock:
+                self.stats[state] += 1
+        return value, state
+
+    def put(self, keyword: str, lat: float, lon: float, radius: float, value):
+        key = search_key(keyword, lat, lon, radius)
+        entry = (value, time.time())
+        with self._lock:
+            self._remember(key, entry)
+        if self.path:
+            self._writer.submit(self._write, key, entry)
+
+    def _write(self, key, entry):
+        try:
+            db = self._db()
+            db.execute("INSERT OR REPLACE INTO search VALUES (?, ?, ?)", (key, json.dumps(entry[0]), entry[1]))
+            db.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"Gagal menyimpan cache pencarian ke disk: {e}")
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            # lewat thread penulis supaya berurutan dengan put() yang masih antri
+            self._writer.submit(self._clear_disk).result()
+
+    def _clear_disk(self):
+        db = self._db()
+        db.execute("DELETE FROM search")
+        db.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        total = sum(self.stats.values())
+        return (self.stats[FRESH] + self.stats[STALE]) / total if total else 0.0
+
+    def summary(self) -> str:
+        return (f"Cache pencarian: hit rate {self.hit_rate:.0%} "
+                f"(segar {self.stats[FRESH]}, basi {self.stats[STALE]}, miss {self.stats[MISS]})")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache(path: str = DEFAULT_CACHE_PATH, ttl: float = 300) -> SearchCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SearchCache(path, ttl=ttl)
+        else:
+            _cache.ttl = ttl
+    return _cache
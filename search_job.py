@@ -0,0 +1,171 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from geo_filter import ResultSet
+from search_cache import FRESH, STALE
+
+# Keyword yang dicari bersamaan dalam satu refresh, lewat Session ApiClient yang sama
+MAX_PARALLEL_KEYWORDS = 6
+
+KEYWORD_FIELD = "search_keyword"
+
+
+def split_keywords(text: str):
+    """'SMA, SMP,Pasar' -> ['SMA', 'SMP', 'Pasar'] (tanpa duplikat, urutan dipertahankan)."""
+    keywords = []
+    seen = set()
+    for keyword in (text or "").split(","):
+        keyword = keyword.strip()
+        if keyword and keyword.lower() not in seen:
+            seen.add(keyword.lower())
+            keywords.append(keyword)
+    return keywords
+
+
+def location_key(loc) -> str:
+    loc_id = loc.get("id")
+    if loc_id is not None:
+        return str(loc_id)
+    return f"{loc.get('latitude')},{loc.get('longitude')},{loc.get('name')}"
+
+
+def tag_keyword(locations, keyword: str):
+    return [dict(loc, **{KEYWORD_FIELD: keyword}) for loc in locations]
+
+
+def merge_keyword_results(results):
+    """
+    Gabungkan hasil per keyword ({keyword: [lokasi]}) menjadi satu list tanpa duplikat id.
+    Lokasi yang cocok dengan beberapa keyword ikut keyword pertama.
+    """
+    merged = {}
+    for keyword, locations in results.items():
+        for loc in locations:
+            merged.setdefault(location_key(loc), dict(loc, **{KEYWORD_FIELD: keyword}))
+    return list(merged.values())
+
+
+class SearchJob:
+    """
+    Satu refresh pencarian (satu atau beberapa keyword), dijalankan di worker TaskRunner.
+    Tiap keyword diambil dari filter radius lokal, cache pencarian, atau stream backend,
+    dan semua keyword dicari bersamaan sehingga waktu total mendekati keyword yang paling lambat.
+    Bila local (LocalSearchEngine) diberikan, hasil backend ikut disimpan ke snapshot lokal (di thread
+    penulisnya, di luar jalur pencarian) dan snapshot itu yang menjawab saat backend tidak bisa dihubungi.
+    Pencarian lewat backend (nearby_search / nearby_search_stream, default ApiClient itu sendiri,
+    bisa juga PostgisBackend); titik pusat tetap dari ApiClient.
+    """
+
+    def __init__(self, api, cache, result_sets, token: str, keywords, lat: float, lon: float, radius: int,
+                 local=None, backend=None):
+        self.api = api
+        self.backend = backend if backend is not None else api
+        self.local = local
+        self.cache = cache
+        self.result_sets = dict(result_sets)
+        self.token = token
+        self.keywords = list(keywords)
+        self.lat = lat
+        self.lon = lon
+        self.radius = radius
+        self._first_lock = threading.Lock()
+        self._streamed = False
+        self._offline = False
+
+    def run(self, progress, cancel):
+        result = {"errors": []}
+        progress("Mengambil titik pusat...")
+        try:
+            center = self.api.center(self.token)
+            if center:
+                result["center"] = center
+        except requests.exceptions.RequestException as e:
+            result["errors"].append(str(e))
+        cancel.check()
+
+        self.lat, self.lon = result.get("center", (self.lat, self.lon))
+        progress("Mencari lokasi...")
+        return self._search_all(result, progress, cancel, refresh=frozenset(), stream=True)
+
+    def revalidate(self, keywords):
+        """Fungsi task: cari ulang ke backend keyword yang hasil cache-nya basi, keyword lain tetap dari cache."""
+        refresh = frozenset(keywords)
+        return lambda progress, cancel: self._search_all({"errors": []}, progress, cancel, refresh, stream=False)
+
+    def _search_all(self, result, progress, cancel, refresh, stream):
+        found = {}
+        stale = []
+        # run() dan revalidate() memakai job yang sama; status offline hanya milik pencarian ini
+        self._offline = False
+
+        def search(keyword):
+            return keyword, self._search(keyword, progress, cancel, keyword in refresh, stream, result.get("center"),
+                                         stale, count=not refresh)
+
+        workers = max(1, min(len(self.keywords), MAX_PARALLEL_KEYWORDS))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(search, keyword) for keyword in self.keywords]:
+                try:
+                    keyword, locations = future.result()
+                    found[keyword] = locations
+                except requests.exceptions.RequestException as e:
+                    result["errors"].append(str(e))
+        cancel.check()
+
+        if found:
+            result["locations"] = merge_keyword_results({k: found[k] for k in self.keywords if k in found})
+        result["result_sets"] = self.result_sets
+        result["streamed"] = self._streamed
+        result["offline"] = self._offline
+        # saat revalidate tidak menjadwalkan revalidate lagi
+        if stale and not refresh:
+            result["revalidate"] = stale
+        return result
+
+    def _search(self, keyword, progress, cancel, refresh, stream, center, stale, count=True):
+        if not refresh:
+            last = self.result_sets.get(keyword.lower())
+            if last is not None and last.covers(keyword, self.lat, self.lon, self.radius, max_age=self.cache.ttl):
+                # hanya radius yang mengecil: filter haversine lokal, tanpa request pencarian
+                return last.within(self.radius)
+
+            cached, state = self.cache.get(keyword, self.lat, self.lon, self.radius, count=count)
+            if state == FRESH:
+                return cached
+            if state == STALE:
+                # hasil basi langsung digambar, diperbarui di background lewat revalidate()
+                stale.append(keyword)
+                return cached
+
+        try:
+            locations = self._fetch(keyword, progress, cancel, stream, center)
+        except requests.exceptions.RequestException as e:
+            if self.local is None:
+                raise
+            print(f"Backend tidak bisa dihubungi, mencari '{keyword}' di data lokal: {e}")
+            self._offline = True
+            # hasil lokal tidak disimpan ke cache supaya pencarian berikutnya tetap mencoba backend
+            return self.local.nearby_search(self.token, self.lat, self.lon, keyword, self.radius)["results"]
+
+        self.cache.put(keyword, self.lat, self.lon, self.radius, locations)
+        self.result_sets[keyword.lower()] = ResultSet(keyword, self.lat, self.lon, self.radius, locations)
+        if self.local is not None:
+            self.local.upsert_later(locations)
+        return locations
+
+    def _fetch(self, keyword, progress, cancel, stream, center):
+        if stream:
+            # tiap batch langsung digambar begitu datang, tidak menunggu seluruh hasil
+            locations = []
+            for batch in self.backend.nearby_search_stream(self.token, self.lat, self.lon, keyword, self.radius):
+                cancel.check()
+                with self._first_lock:
+                    first = not self._streamed
+                    self._streamed = True
+                progress({"first": first, "center": center, "batch": tag_keyword(batch, keyword)})
+                locations.extend(batch)
+        else:
+            locations = self.backend.nearby_search(self.token, self.lat, self.lon, keyword, self.radius)["results"]
+        return locations
@@ -0,0 +1,270 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# URL upstream per sumber tile; path lokal selalu gsi://app/tiles/<sumber>/{z}/{x}/{y}
+TILE_SOURCES = {
+    "esri_topo": "https://server.arcgisonline.com/ArcGIS/rest/services/World_Topo_Map/MapServer/tile/{z}/{y}/{x}",
+    "esri_satellite": "https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}",
+    "osm": "https://tile.openstreetmap.org/{z}/{x}/{y}.png",
+}
+
+# Kebijakan tile.openstreetmap.org melarang bulk download, jadi OSM tidak ikut di-prefetch
+PREFETCH_SOURCES = ("esri_topo", "esri_satellite")
+
+TILE_URL = "/tiles/{source}/{{z}}/{{x}}/{{y}}"
+MAP_TILE_PATH_RE = re.compile(r"^/tiles/(" + "|".join(TILE_SOURCES) + r")/(\d+)/(\d+)/(\d+)$")
+
+DEFAULT_CACHE_PATH = os.path.join("cache", "tiles.mbtiles")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Waktu akses terakhir (untuk LRU) ditulis per batch, bukan satu UPDATE + commit per tile yang dibaca
+TOUCH_BATCH = 256
+TOUCH_INTERVAL = 30
+
+
+def _tile_mime(data: bytes) -> str:
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    return "application/octet-stream"
+
+
+def lonlat_to_tile(lon: float, lat: float, z: int):
+    n = 2 ** z
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_range(lat: float, lon: float, radius_m: float, z: int):
+    """(x0, y0, x1, y1) tile di zoom z yang menutupi bounding box lingkaran radius_m di sekitar (lat, lon)."""
+    dlat = radius_m / 111320.0
+    dlon = radius_m / (111320.0 * max(math.cos(math.radians(lat)), 1e-6))
+    x0, y0 = lonlat_to_tile(lon - dlon, lat + dlat, z)
+    x1, y1 = lonlat_to_tile(lon + dlon, lat - dlat, z)
+    return x0, y0, x1, y1
+
+
+def tiles_for_radius(lat: float, lon: float, radius_m: float, z: int):
+    """Semua tile di zoom z yang menutupi bounding box lingkaran radius_m di sekitar (lat, lon)."""
+    x0, y0, x1, y1 = tile_range(lat, lon, radius_m, z)
+    for x in range(x0, x1 + 1):
+        for y in range(y0, y1 + 1):
+            yield x, y
+
+
+class TileCache:
+    """
+    Cache tile peta persisten di SQLite (skema ala MBTiles, ditambah kolom sumber & waktu akses).
+    Tile yang paling lama tidak dipakai dibuang (LRU) bila ukuran total melewati max_bytes.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._touched = {}      # (source, z, x, y) -> waktu akses, belum ditulis ke SQLite
+        self._touched_at = time.monotonic()
+        self._session = requests.Session()
+        self._session.headers["User-Agent"] = "GeoSpatialInfo/1.0 (tile cache)"
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self._session.mount("https://", adapter)
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        db = self._db()
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS tiles (
+                source TEXT NOT NULL,
+                zoom_level INTEGER NOT NULL,
+                tile_column INTEGER NOT NULL,
+                tile_row INTEGER NOT NULL,
+                tile_data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (source, zoom_level, tile_column, tile_row)
+            );
+            CREATE INDEX IF NOT EXISTS tiles_last_access ON tiles (last_access);
+        """)
+        db.execute("INSERT OR REPLACE INTO metadata VALUES ('format', 'mixed')")
+        db.commit()
+        self._total = db.execute("SELECT COALESCE(SUM(size), 0) FROM tiles").fetchone()[0]
+
+    def _db(self) -> sqlite3.Connection:
+        # koneksi SQLite per thread (dipakai dari UI thread dan worker prefetch)
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def get(self, source: str, z: int, x: int, y: int):
+        db = self._db()
+        row = db.execute(
+            "SELECT tile_data FROM tiles WHERE source=? AND zoom_level=? AND tile_column=? AND tile_row=?",
+            (source, z, x, y),
+        ).fetchone()
+        if row is None:
+            return None
+        with self._lock:
+            self._touched[(source, z, x, y)] = time.time()
+            if len(self._touched) >= TOUCH_BATCH or time.monotonic() - self._touched_at >= TOUCH_INTERVAL:
+                self._flush_touched(db)
+        return row[0]
+
+    def _flush_touched(self, db: sqlite3.Connection):
+        # dipanggil dengan self._lock dipegang
+        if self._touched:
+            db.executemany(
+                "UPDATE tiles SET last_access=? WHERE source=? AND zoom_level=? AND tile_column=? AND tile_row=?",
+                [(t, *key) for key, t in self._touched.items()],
+            )
+            db.commit()
+            self._touched.clear()
+        self._touched_at = time.monotonic()
+
+    def contains(self, source: str, z: int, x: int, y: int) -> bool:
+        return self._db().execute(
+            "SELECT 1 FROM tiles WHERE source=? AND zoom_level=? AND tile_column=? AND tile_row=?",
+            (source, z, x, y),
+        ).fetchone() is not None
+
+    def put(self, source: str, z: int, x: int, y: int, data: bytes):
+        db = self._db()
+        with self._lock:
+            old = db.execute(
+                "SELECT size FROM tiles WHERE source=? AND zoom_level=? AND tile_column=? AND tile_row=?",
+                (source, z, x, y),
+            ).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (source, z, x, y, sqlite3.Binary(data), len(data), time.time()),
+            )
+            db.commit()
+            self._total += len(data) - (old[0] if old else 0)
+            if self._total > self.max_bytes:
+                self._evict(db)
+
+    def _evict(self, db: sqlite3.Connection):
+        # urutan LRU harus memakai waktu akses terbaru
+        self._flush_touched(db)
+        # buang sampai 90% dari batas supaya eviction tidak jalan di setiap put
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for rowid, size in db.execute("SELECT rowid, size FROM tiles ORDER BY last_access"):
+            if self._total - freed <= target:
+                break
+            victims.append((rowid,))
+            freed += size
+        db.executemany("DELETE FROM tiles WHERE rowid=?", victims)
+        db.commit()
+        self._total -= freed
+
+    def download(self, source: str, z: int, x: int, y: int):
+        url = TILE_SOURCES[source].format(z=z, x=x, y=y)
+        response = self._session.get(url, timeout=10)
+        response.raise_for_status()
+        data = response.content
+        self.put(source, z, x, y, data)
+        return data
+
+    def fetch(self, source: str, z: int, x: int, y: int):
+        """Ambil tile dari cache, kalau belum ada download dari upstream lalu simpan."""
+        data = self.get(source, z, x, y)
+        if data is not None:
+            return data
+        try:
+            return self.download(source, z, x, y)
+        except requests.exceptions.RequestException as e:
+            print(f"Gagal download tile {source}/{z}/{x}/{y}: {e}")
+            return None
+
+    def prefetch(self, lat: float, lon: float, radius_m: float, min_zoom: int, max_zoom: int,
+                 sources=PREFETCH_SOURCES, cancel: threading.Event = None, max_tiles: int = 20000,
+                 workers: int = 4):
+        """
+        Isi cache dengan semua tile di sekitar titik pusat (lingkaran radius_m) untuk zoom min..max.
+        Jumlah tile dihitung per zoom dari rentang x/y dulu; zoom yang membuat total melewati max_tiles
+        (radius besar) tidak dienumerasi sama sekali. Mengembalikan (jumlah tile didownload, jumlah tile sudah ada di cache).
+        """
+        todo = []
+        cached = 0
+        budget = max_tiles
+        db = self._db()
+        for z in range(min_zoom, max_zoom + 1):
+            x0, y0, x1, y1 = tile_range(lat, lon, radius_m, z)
+            count = (x1 - x0 + 1) * (y1 - y0 + 1) * len(sources)
+            if count > budget:
+                print(f"Prefetch berhenti sebelum zoom {z}: butuh {count} tile, sisa batas {budget} dari {max_tiles}")
+                break
+            budget -= count
+            for source in sources:
+                if cancel is not None and cancel.is_set():
+                    return 0, cached
+                # satu query per sumber & zoom untuk tile yang sudah ada, bukan satu query per tile
+                existing = set(db.execute(
+                    "SELECT tile_column, tile_row FROM tiles WHERE source=? AND zoom_level=? "
+                    "AND tile_column BETWEEN ? AND ? AND tile_row BETWEEN ? AND ?",
+                    (source, z, x0, x1, y0, y1),
+                ))
+                cached += len(existing)
+                todo.extend(
+                    (source, z, x, y)
+                    for x in range(x0, x1 + 1) for y in range(y0, y1 + 1) if (x, y) not in existing
+                )
+
+        downloaded = 0
+
+        def job(tile):
+            if cancel is not None and cancel.is_set():
+                return False
+            try:
+                self.download(*tile)
+                return True
+            except requests.exceptions.RequestException:
+                return False
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for ok in pool.map(job, todo):
+                downloaded += ok
+        return downloaded, cached
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_tile_cache(path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES) -> TileCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TileCache(path, max_bytes)
+        else:
+            _cache.max_bytes = max_bytes
+    return _cache
+
+
+def tile_resource(source, z, x, y):
+    """Resource untuk GsiSchemeHandler (dijalankan di worker thread)."""
+    data = get_tile_cache().fetch(source, int(z), int(x), int(y))
+    if data is None:
+        return None
+    return data, _tile_mime(data), "public, max-age=86400"
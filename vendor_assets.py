@@ -0,0 +1,160 @@
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import sys
+from urllib.parse import urljoin, urlsplit
+
+import folium
+import requests
+
+from scheme_handler import IMMUTABLE
+
+VENDOR_DIR = "vendor"
+MANIFEST_NAME = "manifest.json"
+
+ASSET_URL = "/assets/{bundle}/{path}"
+ASSET_PATH_RE = re.compile(r"^/assets/([0-9a-f]+)/(.+)$")
+
+# Aset di luar default folium yang dipakai langsung oleh script peta (ikon marker klik kanan)
+EXTRA_ASSETS = (
+    "https://cdnjs.cloudflare.com/ajax/libs/leaflet/1.9.3/images/marker-icon.png",
+    "https://cdnjs.cloudflare.com/ajax/libs/leaflet/1.9.3/images/marker-shadow.png",
+)
+
+CSS_URL_RE = re.compile(r"""url\(\s*['"]?([^'")]+?)['"]?\s*\)""")
+
+for _ext, _mime in ((".woff2", "font/woff2"), (".woff", "font/woff"), (".ttf", "font/ttf"),
+                    (".eot", "application/vnd.ms-fontobject"), (".svg", "image/svg+xml")):
+    mimetypes.add_type(_mime, _ext)
+
+
+def page_asset_urls():
+    """Semua URL CDN yang dirujuk halaman peta."""
+    return [url for _, url in folium.Map.default_js + folium.Map.default_css] + list(EXTRA_ASSETS)
+
+
+def _relative_path(url: str) -> str:
+    # host/path dipertahankan supaya url() relatif di CSS (font, gambar) tetap benar
+    parts = urlsplit(url)
+    return parts.netloc + parts.path
+
+
+def vendor(urls, vendor_dir: str = VENDOR_DIR, session=None):
+    """
+    Download aset beserta file yang dirujuk url() di dalam CSS ke vendor_dir,
+    lalu tulis manifest berisi hash sha256 tiap file.
+    """
+    session = session or requests.Session()
+    files = {}
+    pages = {}
+    queue = [(url, True) for url in urls]
+    while queue:
+        url, top_level = queue.pop(0)
+        url = url.split("#")[0].split("?")[0]
+        rel = _relative_path(url)
+        if top_level:
+            pages[url] = rel
+        if rel in files:
+            continue
+
+        try:
+            response = session.get(url, timeout=30)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            if top_level:
+                raise
+            # file yang dirujuk CSS tapi tidak ada di CDN (mis. font lama) cukup dilewati
+            print(f"Lewati {url}: {e}")
+            continue
+        data = response.content
+        path = os.path.join(vendor_dir, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        files[rel] = hashlib.sha256(data).hexdigest()
+        print(f"{rel} ({len(data) // 1024} KiB)")
+
+        if rel.endswith(".css"):
+            for ref in CSS_URL_RE.findall(data.decode("utf-8", "replace")):
+                if not ref.startswith("data:"):
+                    queue.append((urljoin(url, ref), False))
+
+    with open(os.path.join(vendor_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump({"urls": pages, "files": files}, f, indent=2, sort_keys=True)
+    return files
+
+
+class AssetBundle:
+    """
+    Aset Leaflet/jQuery/Bootstrap/Font Awesome hasil vendor(), dilayani lewat gsi://app/assets/<hash>/...
+    dengan cache immutable. Hash dihitung dari isi semua file, jadi URL berubah kalau asetnya berubah.
+    Bila folder vendor belum ada, halaman tetap memakai URL CDN.
+    """
+
+    def __init__(self, vendor_dir: str = VENDOR_DIR):
+        self.vendor_dir = vendor_dir
+        self.urls = {}
+        self.files = {}
+        self.hash = None
+        self._cache = {}
+
+        manifest = os.path.join(vendor_dir, MANIFEST_NAME)
+        if not os.path.isfile(manifest):
+            print(f"Aset belum di-vendor ({manifest} tidak ada), memakai CDN")
+            return
+        with open(manifest, encoding="utf-8") as f:
+            data = json.load(f)
+        self.urls = data["urls"]
+        self.files = data["files"]
+        digest = hashlib.sha256()
+        for rel in sorted(self.files):
+            digest.update(f"{rel}:{self.files[rel]}\n".encode("utf-8"))
+        self.hash = digest.hexdigest()[:16]
+
+    @property
+    def available(self) -> bool:
+        return self.hash is not None
+
+    def url_for(self, url: str) -> str:
+        rel = self.urls.get(url)
+        if not self.available or rel is None:
+            return url
+        return ASSET_URL.format(bundle=self.hash, path=rel)
+
+    def rewrite(self, html: str) -> str:
+        """Ganti semua URL CDN yang sudah di-vendor di HTML dengan URL lokal."""
+        if not self.available:
+            return html
+        for url in sorted(self.urls, key=len, reverse=True):
+            html = html.replace(url, self.url_for(url))
+        return html
+
+    def resource(self, bundle: str, rel: str):
+        """Resource untuk GsiSchemeHandler; hash lama (halaman basi) dianggap tidak ada."""
+        if bundle != self.hash or rel not in self.files:
+            return None
+        body = self._cache.get(rel)
+        if body is None:
+            with open(os.path.join(self.vendor_dir, rel), "rb") as f:
+                body = f.read()
+            self._cache[rel] = body
+        mime = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+        return body, mime, IMMUTABLE
+
+
+_bundle = None
+
+
+def get_asset_bundle() -> AssetBundle:
+    global _bundle
+    if _bundle is None:
+        _bundle = AssetBundle()
+    return _bundle
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else VENDOR_DIR
+    files = vendor(page_asset_urls(), target)
+    print(f"{len(files)} file aset tersimpan di {target}")
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+
+from boundary_tiles import tile_bounds
+from geo_filter import haversine_m
+from local_engine import ESTIMATED_FIELD, ESTIMATED_SPEED_M_PER_MIN
+from search_job import merge_keyword_results, split_keywords
+from tile_cache import lonlat_to_tile
+
+# Lokasi dimuat per tile slippy map di zoom ini (~4,9 km di ekuator)
+VIEWPORT_TILE_ZOOM = 13
+# Di bawah zoom ini area pandang terlalu luas untuk dimuat per tile
+VIEWPORT_MIN_ZOOM = 11
+MAX_VIEWPORT_TILES = 64
+# Tile dimuat di pool sendiri supaya pencarian utama tidak mengantri di belakang puluhan tile
+VIEWPORT_THREADS = 2
+# Sama dengan ttl SearchCache: lokasi per tile dimuat ulang setelah 5 menit
+VIEWPORT_TILE_TTL = 300
+
+
+def viewport_tiles(south: float, west: float, north: float, east: float, z: int = VIEWPORT_TILE_ZOOM):
+    """Tile z/x/y yang menutupi bounding box area pandang, urut dari tengah ke pinggir."""
+    x0, y0 = lonlat_to_tile(west, north, z)
+    x1, y1 = lonlat_to_tile(east, south, z)
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+    tiles = [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+    tiles.sort(key=lambda t: (t[0] - cx) ** 2 + (t[1] - cy) ** 2)
+    return tiles
+
+
+def fetch_tile_locations(api, token: str, keyword: str, z: int, x: int, y: int, cancel=None):
+    """
+    Lokasi di dalam satu tile untuk semua keyword (dipisah koma). Backend hanya punya pencarian
+    radius, jadi tile diminta sebagai lingkaran yang melingkupinya lalu dipotong ke bbox tile
+    (tiap lokasi masuk tepat satu tile). Jarak/durasi dari backend diukur dari tengah tile,
+    jadi dibuang; pakai measure_from() terhadap titik pusat sebelum ditampilkan.
+    """
+    min_lon, min_lat, max_lon, max_lat = tile_bounds(z, x, y)
+    lat = (min_lat + max_lat) / 2
+    lon = (min_lon + max_lon) / 2
+    radius = float(haversine_m(lat, lon, [max_lat], [max_lon])[0]) + 1
+
+    results = {}
+    for kw in split_keywords(keyword):
+        # tile yang keluar dari area pandang dibatalkan; keyword berikutnya tidak perlu diminta
+        if cancel is not None:
+            cancel.check()
+        results[kw] = api.nearby_search(token, lat, lon, kw, int(radius))["results"]
+    locations = merge_keyword_results(results)
+    inside = []
+    for loc in locations:
+        try:
+            loc_lat = float(loc.get("latitude"))
+            loc_lon = float(loc.get("longitude"))
+        except (TypeError, ValueError):
+            continue
+        if min_lat <= loc_lat < max_lat and min_lon <= loc_lon < max_lon:
+            inside.append({k: v for k, v in loc.items()
+                           if k not in ("exact_distance_meter", "exact_duration_minute")})
+    return inside
+
+
+def measure_from(locations, lat: float, lon: float):
+    """Salinan lokasi dengan jarak garis lurus & perkiraan durasi dari titik pusat (seperti snapshot lokal)."""
+    if not locations:
+        return []
+    distances = haversine_m(lat, lon, [float(loc["latitude"]) for loc in locations],
+                            [float(loc["longitude"]) for loc in locations])
+    return [
+        dict(loc, exact_distance_meter=float(d), exact_duration_minute=float(d) / ESTIMATED_SPEED_M_PER_MIN,
+             **{ESTIMATED_FIELD: True})
+        for loc, d in zip(locations, distances)
+    ]
+
+
+class ViewportTileCache:
+    """
+    LRU hasil per (keyword, z, x, y); tile yang sudah dimuat tidak diminta ulang saat peta digeser,
+    sampai umurnya lewat ttl.
+    """
+
+    def __init__(self, max_tiles: int = 512, ttl: float = VIEWPORT_TILE_TTL):
+        self.max_tiles = max_tiles
+        self.ttl = ttl
+        self._tiles = OrderedDict()     # key -> (lokasi, waktu disimpan)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(keyword: str, z: int, x: int, y: int):
+        return (keyword or "").strip().lower(), z, x, y
+
+    def get(self, key):
+        with self._lock:
+            entry = self._tiles.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[1] > self.ttl:
+                del self._tiles[key]
+                return None
+            self._tiles.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, locations):
+        with self._lock:
+            self._tiles[key] = (locations, time.time())
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
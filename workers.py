@@ -0,0 +1,140 @@
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class Cancelled(Exception):
+    """Task dibatalkan karena sudah ada task yang lebih baru."""
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """Panggil di antara tahap kerja; hentikan task bila sudah dibatalkan."""
+        if self._event.is_set():
+            raise Cancelled()
+
+
+class _TaskSignals(QObject):
+    progress = Signal(int, str)
+    partial = Signal(int, object)
+    finished = Signal(int, object)
+    failed = Signal(int, object)
+
+
+class _Task(QRunnable):
+    def __init__(self, task_id, fn, token, signals):
+        super().__init__()
+        self.task_id = task_id
+        self.fn = fn
+        self.token = token
+        self.signals = signals
+
+    def run(self):
+        def progress(message):
+            # teks = status untuk ditampilkan, selain itu = hasil parsial (mis. batch hasil stream)
+            if self.token.cancelled:
+                return
+            if isinstance(message, str):
+                self.signals.progress.emit(self.task_id, message)
+            else:
+                self.signals.partial.emit(self.task_id, message)
+
+        # task yang sudah digantikan sebelum sempat jalan tidak perlu mengirim request sama sekali
+        if self.token.cancelled:
+            return
+        try:
+            result = self.fn(progress, self.token)
+        except Cancelled:
+            return
+        except Exception as e:
+            if not self.token.cancelled:
+                self.signals.failed.emit(self.task_id, e)
+            return
+        if not self.token.cancelled:
+            self.signals.finished.emit(self.task_id, result)
+
+
+class TaskRunner(QObject):
+    """
+    Menjalankan fungsi berat (request backend, render folium) di QThreadPool.
+    fn(progress, cancel) dijalankan di worker; callback on_finished/on_progress/on_partial/on_failed
+    dipanggil di UI thread. Task dengan nama yang sama saling menggantikan: task lama
+    dibatalkan dan hasilnya dibuang, jadi hanya permintaan terakhir yang sampai ke UI.
+    """
+
+    def __init__(self, parent=None, max_threads: int = 4):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._signals = _TaskSignals(self)
+        self._signals.progress.connect(self._on_progress)
+        self._signals.partial.connect(self._on_partial)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+        self._next_id = 0
+        self._tasks = {}    # id -> (nama, token, callbacks)
+        self._latest = {}   # nama -> id task terbaru
+
+    def submit(self, name: str, fn, on_finished, on_progress=None, on_failed=None,
+               on_partial=None) -> CancelToken:
+        self.cancel(name)
+        task_id = self._next_id
+        self._next_id += 1
+        token = CancelToken()
+        self._tasks[task_id] = (name, token, (on_finished, on_progress, on_failed, on_partial))
+        self._latest[name] = task_id
+        self._pool.start(_Task(task_id, fn, token, self._signals))
+        return token
+
+    def cancel(self, name: str):
+        task_id = self._latest.pop(name, None)
+        task = self._tasks.pop(task_id, None)
+        if task is not None:
+            task[1].cancel()
+
+    def is_running(self, name: str) -> bool:
+        return name in self._latest
+
+    def _current(self, task_id):
+        task = self._tasks.get(task_id)
+        if task is None or task[1].cancelled:
+            return None
+        return task
+
+    def _on_progress(self, task_id, message):
+        task = self._current(task_id)
+        if task and task[2][1]:
+            task[2][1](message)
+
+    def _on_partial(self, task_id, data):
+        task = self._current(task_id)
+        if task and task[2][3]:
+            task[2][3](data)
+
+    def _done(self, task_id):
+        name, _, callbacks = self._tasks.pop(task_id)
+        if self._latest.get(name) == task_id:
+            del self._latest[name]
+        return callbacks
+
+    def _on_finished(self, task_id, result):
+        if self._current(task_id):
+            self._done(task_id)[0](result)
+
+    def _on_failed(self, task_id, error):
+        if self._current(task_id):
+            on_failed = self._done(task_id)[2]
+            if on_failed:
+                on_failed(error)
+            else:
+                print(f"Task gagal: {error}")